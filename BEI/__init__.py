@@ -0,0 +1,980 @@
+## Select the direct collection holding the object, then select the object
+
+## Plan for custom locations: Select linked around selected faces. Select square around 
+
+bl_info = {
+    "name": "Optimal BrightMarker Embedder",
+    "author": "Jamison O\'Keefe",
+    "version": (1, 0),
+    "blender": (2, 80, 0),
+    "location": "View3D > Object",
+    "description": "Optimally embeds a code in an object",
+    "warning": "",
+    "doc_url": "",
+    "category": "Object",
+}
+
+
+import bpy
+import bmesh
+import mathutils
+from mathutils import Matrix
+from mathutils.bvhtree import BVHTree
+import random
+import math
+from math import degrees,pi
+import copy
+import os
+import numpy as np
+from bpy.types import (
+    AddonPreferences,
+    Operator,
+    Panel,
+    PropertyGroup,
+)
+from bpy.props import (
+    IntProperty,
+    FloatProperty,
+    BoolProperty,
+    StringProperty,
+    EnumProperty,
+    FloatVectorProperty,
+)
+
+## Reload the core too when Blender reloads the add-on's scripts
+if "bei_core" in locals():
+    import importlib
+    importlib.reload(bei_core)
+else:
+    from . import bei_core
+
+
+####### FUNCTIONS #######
+
+def get_bmesh(obj):
+    """
+    Gets the bmesh for an object.
+    
+    Input:
+        obj (Blender object)
+    Returns:
+        bmesh of obj
+    """
+    bpy.ops.object.mode_set(mode="EDIT")
+
+    return bmesh.from_edit_mesh(obj.data)
+
+class ScratchSpace:
+    """
+    Removes the objects and meshes made during a run afterwards, datablocks included, so repeated
+    runs don't pile up orphan meshes.
+
+    Everything created after the ScratchSpace is made is removed by clear(), except objects passed
+    to keep() and the cached ArUco meshes.
+    """
+    def __init__(self):
+        self.objects = set(bpy.data.objects)
+        self.meshes = set(bpy.data.meshes)
+        self.active = bpy.context.view_layer.objects.active
+        self.kept = set()
+
+    def keep(self, obj):
+        """
+        Marks an object made during the run as a result, so clear() leaves it and its mesh.
+        """
+        self.kept.add(obj)
+
+    def clear(self):
+        """
+        Removes every temporary object and mesh.
+        """
+        ## Objects can't be removed cleanly while a mesh is in Edit Mode, e.g. after a failed run
+        if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode="OBJECT")
+        for obj in set(bpy.data.objects) - self.objects - self.kept:
+            bpy.data.objects.remove(obj, do_unlink=True)
+        for me in set(bpy.data.meshes) - self.meshes:
+            if me.users == 0 and not me.name.startswith("ArUco "):
+                bpy.data.meshes.remove(me)
+        ## Give the user back the object they ran BEI on
+        if self.active is not None and self.active.name in bpy.data.objects:
+            bpy.context.view_layer.objects.active = self.active
+            self.active.select_set(state = True)
+
+def world_vertices(me, matrix):
+    """
+    Reads the vertex positions of a mesh in world space.
+
+    Input:
+        me (Blender mesh)
+        matrix (4x4 world matrix of the object using the mesh)
+    Return:
+        co (Numpy array of shape (vertices, 3))
+    """
+    co = np.empty(len(me.vertices) * 3, np.float32)
+    me.vertices.foreach_get("co", co)
+    matrix = np.array(matrix, float)
+
+    return co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+def mesh_arrays(obj):
+    """
+    Reads an object's mesh into the arrays bei_core works on, in world space.
+
+    Input:
+        obj (Blender mesh object, must be in Object Mode)
+    Return:
+        bei_core.MeshArrays of obj, with Blender's own triangulation
+    """
+    me = obj.data
+    count = len(me.polygons)
+    loop_start = np.empty(count, np.int32)
+    me.polygons.foreach_get("loop_start", loop_start)
+    loop_total = np.empty(count, np.int32)
+    me.polygons.foreach_get("loop_total", loop_total)
+    loop_verts = np.empty(len(me.loops), np.int32)
+    me.loops.foreach_get("vertex_index", loop_verts)
+    ## Store the loops face by face, in case the faces don't list them in order
+    loop_order = np.repeat(loop_start - (np.cumsum(loop_total) - loop_total), loop_total) + np.arange(loop_total.sum())
+    me.calc_loop_triangles()
+    tri_verts = np.empty(len(me.loop_triangles) * 3, np.int32)
+    me.loop_triangles.foreach_get("vertices", tri_verts)
+    tri_face = np.empty(len(me.loop_triangles), np.int32)
+    me.loop_triangles.foreach_get("polygon_index", tri_face)
+
+    return bei_core.MeshArrays(world_vertices(me, obj.matrix_world), loop_verts[loop_order], loop_total, tri_verts.reshape(-1, 3), tri_face)
+
+def find_target_collection(obj, col):
+    """
+    Finds and returns the LayerCollection that is the immediate parent of the target obj.
+    
+    Input:
+        obj (target object)
+        col (LayerCollection, defaults to the top of the hierarchy)
+        
+    Returns:
+        LayerCollection containing the target obj
+    """
+    col_objs = col.collection.objects
+    ## If the object is in the collection, return it
+    for i in range(len(col_objs)):
+        if col_objs[i] == obj:
+            return col
+    ## If this collection doesn't contain obj, recurse
+    for child_collection in col.children:
+        res = find_target_collection(obj, child_collection)
+        if res != None:
+            return res
+    ## If this collection tree doesn't contain obj, return None
+    return None
+
+def join_code_collection(codecol):
+    """
+    Joins the curves of an imported code into a single mesh object.
+
+    Input:
+        codecol (collection holding the curves of an imported .svg code)
+    Return:
+        codeobj (mesh object with its origin at the center of the code)
+    """
+    bpy.ops.object.mode_set(mode="OBJECT")
+    ## Convert all of the curves to meshes
+    for curveobj in codecol.all_objects:
+        curveobj.select_set(state = True)
+        bpy.context.view_layer.objects.active = curveobj
+        bpy.ops.object.convert(target='MESH')
+    bpy.context.view_layer.objects.active = codecol.all_objects[0]
+    with bpy.context.temp_override(active_object=bpy.context.active_object, selected_editable_objects=codecol.all_objects):
+        bpy.ops.object.join()
+    ## Get the single, joined object
+    codeobj = codecol.all_objects[0]
+
+    ## Remove doubles from code mesh
+    bpy.ops.object.select_all(action='DESELECT')
+    bpy.context.view_layer.objects.active = codeobj
+    codeobj.select_set(state = True)
+    bpy.ops.object.mode_set(mode="EDIT")
+    for face in get_bmesh(codeobj).faces:
+        face.select = True
+    bpy.ops.mesh.remove_doubles()
+    bpy.ops.object.mode_set(mode="OBJECT")
+
+    ## Set origin to the center of the code
+    bpy.context.scene.cursor.location = (max(vert.co.x for vert in codeobj.data.vertices)/2, max(vert.co.y for vert in codeobj.data.vertices)/2, 0)
+    bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
+
+    return codeobj
+
+def aruco_mesh(arucodict, arucoid):
+    """
+    Returns the mesh of an ArUco, building it only the first time the ID is used.
+
+    Input:
+        arucodict (str dictionary name like "4X4_50")
+        arucoid (int ID within the dictionary)
+    Return:
+        me (Blender mesh, 1 unit per cell and centered on the origin)
+    """
+    name = f"ArUco {arucodict} {arucoid}"
+    me = bpy.data.meshes.get(name)
+    if me is None:
+        verts, faces = bei_core.aruco_geometry(arucodict, arucoid)
+        me = bpy.data.meshes.new(name)
+        me.from_pydata(verts, [], faces)
+        me.update()
+
+    return me
+
+class WorkingSurface:
+    """
+    Welded copy of a model's surface in world space, made once per run and shared by every marker.
+
+    One BVH tree of the whole surface is built per run. Each marker's ray casts only reach as far
+    as the marker is long, so they touch the part of the tree around the marker.
+    """
+
+    def __init__(self, obj, merge_dist=0.0001):
+        me = obj.data
+        me.calc_loop_triangles()
+        tri_verts = np.empty(len(me.loop_triangles) * 3, np.int32)
+        me.loop_triangles.foreach_get("vertices", tri_verts)
+        co = world_vertices(me, obj.matrix_world)
+        ## Merge vertices closer than merge_dist, like remove_doubles
+        keys = np.round(co / merge_dist).astype(np.int64)
+        keys, first, welded = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        self.verts = co[first]
+        tris = welded.reshape(-1)[tri_verts].reshape(-1, 3)
+        ## Drop triangles that collapsed into a line or a point
+        self.tris = tris[(tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 2] != tris[:, 0])]
+        self.bvh = BVHTree.FromPolygons(self.verts.tolist(), self.tris.tolist(), all_triangles=True)
+
+def snap_along(bvh, point, direction, reach):
+    """
+    Finds the closest surface point on the line through a point, within reach of it.
+
+    Input:
+        bvh (BVHTree of the surface)
+        point (mathutils Vector)
+        direction (mathutils Vector, unit length)
+        reach (float)
+    Return:
+        (location, normal) of the surface point, both None if the line misses the surface
+    """
+    front = bvh.ray_cast(point, -direction, reach)
+    back = bvh.ray_cast(point, direction, reach)
+    if back[0] is not None and (front[0] is None or back[3] < front[3]):
+        return back[0], back[1]
+
+    return front[0], front[1]
+
+def project_code(me, matrix, bvh, spacing):
+    """
+    Lays a flat code onto the surface under it by moving its vertices along the code's normal,
+    subdividing it first if the surface there isn't flat.
+
+    Input:
+        me (Blender mesh of the code, flat in its local XY plane)
+        matrix (4x4 world matrix placing the code)
+        bvh (BVHTree of the surface in world space)
+        spacing (float, longest edge to leave on a curved surface)
+    Return:
+        verts (list of world space vertex coordinates of the code lying on the surface)
+        faces (list of vertex index lists)
+    """
+    normal = (matrix.to_3x3() @ mathutils.Vector((0, 0, 1))).normalized()
+    bm = bmesh.new()
+    bm.from_mesh(me)
+    bm.transform(matrix)
+    reach = np.ptp(np.array([vert.co for vert in bm.verts]), axis=0).max()
+    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=reach * 1e-5)
+
+    ## The code can be projected vertex by vertex if the surface under every vertex and face center is one plane
+    probes = [vert.co.copy() for vert in bm.verts] + [face.calc_center_median() for face in bm.faces]
+    hits = [snap_along(bvh, probe, normal, reach) for probe in probes]
+    found = [(co, nor) for co, nor in hits if co is not None]
+    flat = len(found) == len(hits)
+    if flat:
+        points = np.array([co for co, nor in found])
+        normals = np.array([nor for co, nor in found])
+        centered = points - points.mean(0)
+        plane = np.linalg.svd(centered)[2][2]
+        flat = np.abs(centered @ plane).max() < spacing * 1e-3 and np.abs(normals @ plane).min() > 0.9999
+    if not flat:
+        longest = max(edge.calc_length() for edge in bm.edges)
+        cuts = min(math.ceil(longest / spacing) - 1, 16)
+        if cuts > 0:
+            bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=cuts, use_grid_fill=True)
+
+    ## Move every vertex onto the surface, dropping the ones with no surface under them
+    missed = []
+    facing = 0
+    for vert in bm.verts:
+        co, nor = snap_along(bvh, vert.co, normal, reach)
+        if co is None:
+            missed.append(vert)
+        else:
+            vert.co = co
+            facing += nor.dot(normal)
+    if missed:
+        bmesh.ops.delete(bm, geom=missed, context='VERTS')
+    ## Make the faces point out of the surface like the model's own faces
+    bm.normal_update()
+    if facing * sum(face.normal.dot(normal) for face in bm.faces) < 0:
+        bmesh.ops.reverse_faces(bm, faces=bm.faces[:])
+
+    ## Keep only the vertices that are still part of a face
+    used = {vert for face in bm.faces for vert in face.verts}
+    verts = [vert for vert in bm.verts if vert in used]
+    index = {vert: ind for ind, vert in enumerate(verts)}
+    faces = [[index[vert] for vert in face.verts] for face in bm.faces]
+    verts = [vert.co.copy() for vert in verts]
+    bm.free()
+
+    return verts, faces
+
+def marker_codes(plan, arucodict, codedata):
+    """
+    Pairs every planned marker with its code mesh and the world matrix that sizes and places it.
+
+    Input:
+        plan (list of bei_core.MarkerPlacement)
+        arucodict (str ArUco dictionary the planned IDs come from)
+        codedata (Blender mesh of the custom code, for markers without an ArUco ID)
+    Return:
+        markers (list of (Blender mesh, 4x4 world Matrix))
+    """
+    markers = []
+    for placement in plan:
+        if placement.arucoid is not None:
+            codedata = aruco_mesh(arucodict, placement.arucoid)
+        ## Size the code, it then goes to its place on the model
+        width, height = mesh_size(codedata)
+        matrix = Matrix(placement.frame.tolist()) @ Matrix.Diagonal((placement.sidelength / width, placement.sidelength / height, 1, 1))
+        markers.append((codedata, matrix))
+
+    return markers
+
+def project_markers(markers, surface, spacing):
+    """
+    Projects every marker's code onto the model and collects them into one set of buffers.
+
+    Input:
+        markers (list of (Blender mesh, 4x4 world Matrix), like marker_codes returns)
+        surface (WorkingSurface of the model)
+        spacing (float, longest edge to leave on a curved surface)
+    Return:
+        (verts, loop_verts, loop_total) (Numpy arrays of all of the projected codes)
+        count (int number of codes that reached the model)
+    """
+    codeverts = []
+    codeloops = []
+    codetotals = []
+    vertcount = 0
+    for codedata, matrix in markers:
+        ## Project the code onto the model along its normal
+        verts, faces = project_code(codedata, matrix, surface.bvh, spacing)
+        ## Skip codes that missed the model completely
+        if not faces:
+            continue
+        codeverts.append(np.array(verts, float).reshape(-1, 3))
+        codeloops.extend(vertcount + ind for face in faces for ind in face)
+        codetotals.extend(len(face) for face in faces)
+        vertcount += len(verts)
+
+    return (np.concatenate(codeverts + [np.empty((0, 3))]), np.array(codeloops, int), np.array(codetotals, int)), len(codeverts)
+
+def write_mesh(name, verts, loop_verts, loop_total):
+    """
+    Creates a mesh from vertex and polygon arrays in one bulk write.
+
+    Input:
+        name (str)
+        verts (Numpy array of shape (vertices, 3))
+        loop_verts (Numpy array, vertex index of each loop)
+        loop_total (Numpy array, number of loops of each polygon)
+    Return:
+        me (Blender mesh)
+    """
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(verts))
+    me.vertices.foreach_set("co", np.asarray(verts, np.float32).ravel())
+    me.loops.add(len(loop_verts))
+    me.loops.foreach_set("vertex_index", np.asarray(loop_verts, np.int32))
+    me.polygons.add(len(loop_total))
+    me.polygons.foreach_set("loop_start", (np.cumsum(loop_total) - loop_total).astype(np.int32))
+    me.polygons.foreach_set("loop_total", np.asarray(loop_total, np.int32))
+    me.update(calc_edges=True)
+
+    return me
+
+def mesh_buffers(obj):
+    """
+    Reads the triangles of an object straight from its mesh buffers, in world space.
+
+    Input:
+        obj (Blender mesh object)
+    Return:
+        co (Numpy array of shape (vertices, 3))
+        tri_verts (Numpy array of shape (triangles, 3), vertex indices of each triangle)
+    """
+    me = obj.data
+    me.calc_loop_triangles()
+    tri_verts = np.empty(len(me.loop_triangles) * 3, np.int32)
+    me.loop_triangles.foreach_get("vertices", tri_verts)
+
+    return world_vertices(me, obj.matrix_world), tri_verts.reshape(-1, 3)
+
+def export_embedded(model, codes, airgaps, directory, name):
+    """
+    Writes an embedded model ready to print: the model with its air gaps and the codes as two
+    .stl files, and both as one two-material .3mf. If no code reached the model, there is no codes
+    .stl and the .3mf only holds the model.
+
+    Input:
+        model (Blender mesh object of the model)
+        codes (list of Blender mesh objects holding the code solids)
+        airgaps (list of Blender mesh objects holding the air gaps)
+        directory (str folder to write to)
+        name (str, the files are called <name>_model.stl, <name>_codes.stl and <name>.3mf)
+    Return:
+        paths (list of str paths written)
+    """
+    body = bei_core.join_buffers([mesh_buffers(obj) for obj in [model] + airgaps])
+    code = bei_core.join_buffers([mesh_buffers(obj) for obj in codes])
+    paths = [os.path.join(directory, f"{name}_model.stl"), os.path.join(directory, f"{name}.3mf")]
+    bei_core.write_stl(paths[0], *body)
+    bei_core.write_3mf(paths[1], [("Model", "#FFFFFF", *body), ("Code", "#000000", *code)])
+    if len(code[1]):
+        paths.insert(1, os.path.join(directory, f"{name}_codes.stl"))
+        bei_core.write_stl(paths[1], *code)
+
+    return paths
+
+def mesh_vertices(me):
+    """
+    Reads the vertex positions of a mesh in its local space.
+
+    Input:
+        me (Blender mesh)
+    Return:
+        co (Numpy array of shape (vertices, 3))
+    """
+    co = np.empty(len(me.vertices) * 3, np.float32)
+    me.vertices.foreach_get("co", co)
+
+    return co.reshape(-1, 3).astype(float)
+
+def mesh_size(me):
+    """
+    Measures a mesh along its local X and Y axes.
+
+    Input:
+        me (Blender mesh)
+    Return:
+        (width, height) (floats)
+    """
+    co = mesh_vertices(me)
+
+    return np.ptp(co[:, 0]), np.ptp(co[:, 1])
+
+class OBJECT_OT_optimalembed(Operator):
+    bl_label = "BrightMarker Embedding Interface"
+    bl_idname = "object.optimalembed"
+    bl_description = "Optimally embeds a code in an object"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    maxfaces: bpy.props.IntProperty(
+        name = "Max faces",
+        default = 1250,
+        min = 750,
+        max = 4000,
+        description = "Finds flat patches on a proxy of about this to twice this many faces if the object is more detailed, markers are still placed on the full object",
+    )
+    
+    sharpness: bpy.props.FloatProperty(
+        name = "Sharpness",
+        default = 0.1,
+        min = 0,
+        max = 2,
+        description = "The angle (radians) between two connected faces at or below which they are considered flat",
+    )
+    
+    accuracy: bpy.props.FloatProperty(
+        name = "Accuracy",
+        default = 1,
+        min = 0,
+        max = 4,
+        description = "Scales the dimensions, and therefore accuracy, of array creation. Between 0.75 and 1 will suffice for nearly all purposes, higher values help on large flat parts",
+    )
+    
+    codes: bpy.props.IntProperty(
+        name = "Number of codes",
+        default = 1,
+        min = 1,
+        max = 10,
+        description = "The number of places the code will be embedded in the object (or number of optimal locations displayed if \"Embedding Code?\" is unchecked))",
+    )
+    exportdir: bpy.props.StringProperty(
+        name = "Export folder",
+        default = "",
+        subtype = 'DIR_PATH',
+        description = "If set, the model with its air gaps and the codes are written here as .stl files and one .3mf",
+    )
+    codename: bpy.props.StringProperty(
+        name = "File name of code",
+        default = "my-qr-code.svg",
+        description = "The name of your imported code collection, usually imported as the file name. e.g. valid input woukd be \"qr-code-download.svg\"",
+    )
+    
+    offset: bpy.props.FloatProperty(
+        name = "Shell thickness",
+        default = 0.1,
+        min = 0,
+        max = 9999,
+        description = "The distance (in Blender units) that the code will be embedded under the object's surface",
+    )
+    
+    thickness: bpy.props.FloatProperty(
+        name = "Marker thickness",
+        default = 0.1,
+        min = 0,
+        max = 100,
+        description = "The desired thickness (in Blender units) of the embedded code",
+    )
+    """
+    usingemb: bpy.props.BoolProperty(
+        name = "Use automated optimal locations",
+        default = False,
+        description = "Check if you are using this mode",
+    )
+    """
+    usingman: bpy.props.BoolProperty(
+        name = "Use manually selected points",
+        default = False,
+        description = "Check if you are using this mode",
+    )
+    sidelength: bpy.props.FloatProperty(
+        name = "Side length",
+        default = 100,
+        min = 0,
+        max = 1000,
+        description = "The side length of embedded markers",
+    )
+    aligncode: bpy.props.BoolProperty(
+        name = "Align marker bottom edge",
+        default = False,
+        description = "Check if you want to align your codes to a set local Z rotation",
+    )
+    plane: bpy.props.EnumProperty(
+        name = "Plane",
+        description = "Select the plane you would like to align your codes to",
+        items = [
+            ('opxy', "XY", "XY Plane"),
+            ('opyz', "YZ", "YZ Plane"),
+            ('opxz', "XZ", "XZ Plane"),
+        ]
+    )
+    alignangle: bpy.props.FloatProperty(
+        name = "Angle (deg)",
+        default = 0,
+        min = 0,
+        max = 360,
+        description = "This sets the local Z rotation for all codes",
+    )
+    searchrotation: bpy.props.BoolProperty(
+        name = "Search marker rotation",
+        default = True,
+        description = "Try rotated markers in each patch so that diagonal or elongated patches fit bigger markers",
+    )
+    spreadcodes: bpy.props.BoolProperty(
+        name = "Spread markers apart",
+        default = False,
+        description = "Place the markers as far from each other as possible instead of on the largest flat patches",
+    )
+    sequential: bpy.props.BoolProperty(
+        name = "Use sequential ArUco IDs",
+        default = False,
+        description = "Embed ArUcos with increasing IDs (0, 1, 2, 3, etc.)",
+    )
+    usinggeometric: bpy.props.BoolProperty(
+        name = "Use uniformly distributed points",
+        default = False,
+        description = "Check if you are using this mode",
+    )
+    """
+    remscale: bpy.props.FloatProperty(
+        name = "Marker Density",
+        default = 0.99,
+        min = 0.5,
+        max = 0.99,
+        description = "This sets the local Z rotation for all codes",
+    )
+    """
+    uniformparam: bpy.props.EnumProperty(
+        name = "On",
+        description = "Select the plane you would like to align your codes to",
+        items = [
+            ('op1', "Whole Object", "Uniformly distribute codes over the whole object"),
+            ('op3', "Whole Object Except Base", "Uniformly distribute codes over the whole object"),
+            ('op2', "Selected Region", "Uniformly distribute codes over the selected region"),
+        ]
+    )
+    fixedaruco: bpy.props.BoolProperty(
+        name = "Use fixed ArUco ID",
+        default = False,
+        description = "Embed a certain ArUco",
+    )
+    arucodict: bpy.props.EnumProperty(
+        name = "Dictionary",
+        description = "The ArUco dictionary that IDs are taken from",
+        items = [(f"{size}X{size}_{count}", f"{size}x{size} ({count} IDs)", f"ArUco dictionary DICT_{size}X{size}_{count}") for size in (4, 5, 6, 7) for count in (50, 100, 250, 1000)],
+    )
+    fixedarucoid: bpy.props.IntProperty(
+        name = "ID",
+        default = 0,
+        min = 0,
+        max = 999,
+        description = "The ArUco ID to be embedded",
+    )
+    startingat: bpy.props.IntProperty(
+        name = "Starting at ID",
+        default = 0,
+        min = 0,
+        max = 999,
+        description = "The ArUco ID start of the sequence",
+    )
+    custom: bpy.props.BoolProperty(
+        name = "Use custom marker",
+        default = False,
+        description = "Embed a custom (imported) code",
+    )
+    fixednum: bpy.props.BoolProperty(
+        name = "Fixed # of Markers",
+        default = False,
+        description = "Embed a fixed number of markers",
+    )
+    intermarker: bpy.props.BoolProperty(
+        name = "Fixed inter-marker distance",
+        default = False,
+        description = "Embed a number of markers determined by the specified distance between them and the space available on the model",
+    )
+    uniformdist: bpy.props.FloatProperty(
+        name = "Distance between markers",
+        default = 1,
+        min = 0,
+        max = 1000,
+        description = "This specifies how far apart the codes will be",
+    )
+    suggestoffset: bpy.props.BoolProperty(
+        name = "Use suggested thicknesses for object color",
+        default = False,
+        description = "Use the suggested depth for your print filament",
+    )
+    customoffset: bpy.props.BoolProperty(
+        name = "Use custom values",
+        default = False,
+        description = "Use a custom depth",
+    )
+    chosencolor: bpy.props.EnumProperty(
+        name = "Color",
+        description = "Select the plane you would like to align your codes to",
+        items = [
+            ('red', "Red", "Use this color's suggested marker depth"),
+            ('green', "Green", "Use this color's suggested marker depth"),
+            ('blue', "Blue", "Use this color's suggested marker depth"),
+            ('magenta', "Magenta", "Use this color's suggested marker depth"),
+            ('black', "Black", "Use this color's suggested marker depth"),
+            ('white', "White", "Use this color's suggested marker depth"),
+            ('irtrans', "IR Transparent", "Use this color's suggested marker depth"),
+        ]
+    )
+
+
+    """
+    @classmethod
+    def poll(cls, context):
+        return context.object.select_get() and context.object.type == 'MESH'
+    """
+    
+    def draw(self, context):
+        
+        ob = bpy.context.object
+        
+        layout = self.layout
+        """
+        # Give the user info on the size of their model in Blender units
+        sizex = max(vert.co.x for vert in ob.data.vertices) - min(vert.co.x for vert in ob.data.vertices)
+        sizey = max(vert.co.y for vert in ob.data.vertices) - min(vert.co.y for vert in ob.data.vertices)
+        sizez = max(vert.co.z for vert in ob.data.vertices) - min(vert.co.z for vert in ob.data.vertices)
+        layout.label(text = f"Dimensions of your model's bounding box:")
+        layout.label(text = f"{np.format_float_scientific(sizex, 1)} x {np.format_float_scientific(sizey, 1)} x {np.format_float_scientific(sizez, 1)} (X x Y x Z)")
+        """
+
+        # 1. marker locations
+        
+        box = layout.box()
+        
+        box.label(text="1. Marker Locations")
+        
+        row = box.row()
+        row.prop(self, "usingman")
+        row.enabled = not self.usinggeometric
+        
+        if self.usingman:
+            row = box.row()
+            row.prop(self, "searchrotation")
+        
+        row = box.row()
+        row.prop(self, "usinggeometric")
+        row.enabled = not self.usingman
+        
+        if self.usinggeometric:
+            row = box.row()
+            row.prop(self, "uniformparam")
+              
+            row = box.row()
+            row.label(text="Based on:")
+                
+            if not self.intermarker:
+                row = box.row()
+                row.prop(self, "fixednum")
+                
+            if self.fixednum:
+                row = box.row()
+                row.prop(self, "codes")
+                if self.uniformparam != 'op2':
+                    row = box.row()
+                    row.prop(self, "spreadcodes")
+                if not (self.spreadcodes and self.uniformparam != 'op2'):
+                    row = box.row()
+                    row.prop(self, "searchrotation")
+                
+            if not self.fixednum:
+                row = box.row()
+                row.prop(self, "intermarker")
+                
+            if self.intermarker:
+                row = box.row()
+                row.prop(self, "uniformdist")
+                
+            
+                
+        layout.row().separator()
+                
+        
+        # 2. marker pattern
+        
+        box = layout.box()
+        
+        box.label(text="2. Marker Content")
+        
+        if not self.sequential and not self.custom:
+            row = box.row()
+            row.prop(self, "fixedaruco")
+        
+        if self.fixedaruco:
+            row = box.row()
+            row.prop(self, "fixedarucoid")
+        
+        if not self.fixedaruco and not self.custom:
+            row = box.row()
+            row.prop(self, "sequential")
+        
+        if self.sequential:
+            row = box.row()
+            row.prop(self, "startingat")
+        
+        if self.fixedaruco or self.sequential:
+            row = box.row()
+            row.prop(self, "arucodict")
+        
+        if not self.fixedaruco and not self.sequential:
+            row = box.row()
+            row.prop(self, "custom")
+        
+        if self.custom:
+            row = box.row()
+            row.prop(self, "codename")
+        
+        layout.row().separator()
+        
+        
+        # 3. marker specs
+        
+        box = layout.box()
+        
+        box.label(text="3. Marker Specifications")
+        
+        row = box.row()
+        row.label(text = "Marker and shell thickness:")
+        
+        if not self.customoffset:
+            row = box.row()
+            row.prop(self, "suggestoffset")
+        
+        if self.suggestoffset:
+            row = box.row()
+            row.prop(self, "chosencolor")
+        
+        if not self.suggestoffset:
+            row = box.row()
+            row.prop(self, "customoffset")
+        
+        if self.customoffset:
+            row = box.row()
+            row.prop(self, "thickness")
+            
+            row = box.row()
+            row.prop(self, "offset")
+        
+        row = box.row()
+        row.label(text = "Marker size:")
+        
+        row = box.row(align=True)
+        row.prop(self, "sidelength")
+        
+        layout.row().separator()
+        
+        # 4. marker alignment
+        
+        box = layout.box()
+        
+        box.label(text="4. Marker Alignment")
+            
+        row = box.row()
+        row.prop(self, "aligncode")
+        if self.aligncode:
+            row = box.row()
+            row.prop(self, "plane")
+            row.prop(self, "alignangle")    
+        
+        layout.row().separator()
+        
+        # 5. export
+        
+        box = layout.box()
+        
+        box.label(text="5. Export")
+        
+        row = box.row()
+        row.prop(self, "exportdir")
+        
+
+    
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+    
+    def execute(self, context):
+        ## Everything made on the way is removed afterwards, even if the run fails
+        scratch = ScratchSpace()
+        try:
+            return self.embed(context, scratch)
+        finally:
+            scratch.clear()
+
+    def embed(self, context, scratch):
+        """
+        Runs BEI on the active object, see execute.
+
+        Input:
+            context (Blender context)
+            scratch (ScratchSpace that removes every temporary object)
+        Return:
+            {'FINISHED'}
+        """
+        ####### ACTIONS BEGIN HERE #######
+        
+        ## Color: (thickness, offset)
+        colordict = {
+        'red': (1.2, 0.9), 
+        'green': (1.2, 0.6), 
+        'blue': (1.2, 0.6), 
+        'magenta': (1.2, 0.8), 
+        'black': (1.2, 0.8), 
+        'white': (1.2, 0.6),
+        'irtrans': (1.2, 1.2),
+        }
+
+        bpy.ops.object.mode_set(mode="OBJECT")
+        ## Store an unadultered copy of the model
+        ORIG_OBJ = bpy.context.object
+        ## Make sure the direct parent collcetion of the desired model is active
+        bpy.context.view_layer.active_layer_collection = find_target_collection(ORIG_OBJ, bpy.context.view_layer.layer_collection)
+        ## Every setting the placement plan reads
+        options = {name: getattr(self, name) for name in bei_core.default_options}
+        ## The selected faces are the region for uniform placement, or the seeds of manual placement
+        selected = np.empty(len(ORIG_OBJ.data.polygons), bool)
+        ORIG_OBJ.data.polygons.foreach_get("select", selected)
+
+        ####### CONFIGURE THE CODES #######
+
+        ## Mesh of the custom code, used for every marker
+        codedata = None
+        if self.custom:
+            codedata = join_code_collection(bpy.data.collections.get(self.codename)).data
+
+        ####### PLAN WHERE THE MARKERS GO #######
+
+        plan, warnings = bei_core.plan_placements(mesh_arrays(ORIG_OBJ), options, np.nonzero(selected)[0], code_co=None if codedata is None else mesh_vertices(codedata))
+        for warning in warnings:
+            self.report({'WARNING'}, warning)
+
+        ## Every marker is its code mesh and the world matrix placing it
+        markers = marker_codes(plan, self.arucodict, codedata)
+
+        
+        ####### CODE PROJECTION #######
+        
+        ## The typed in offset and thickness, unless the suggested ones for the filament color are wanted
+        shellthickness = self.offset
+        thick = self.thickness
+        if self.suggestoffset:
+            shellthickness = colordict[self.chosencolor][1]
+            thick = colordict[self.chosencolor][0]
+
+        ## Welded surface of the model that the codes are projected onto
+        surface = WorkingSurface(ORIG_OBJ)
+        ## All of the projected codes are collected, then solidified and written at once
+        codes, count = project_markers(markers, surface, self.sidelength / 12)
+
+        ####### EMBED AND EXTRUDE THE CODES #######
+
+        solid = bei_core.solidify(*codes, shellthickness, thick)
+        codepieces = write_mesh("Code Pieces", *solid)
+        ## The air gaps are the code solids turned inside out
+        airgaps = write_mesh("Air Gaps", solid[0], bei_core.reverse_polygons(solid[1], solid[2]), solid[2])
+        codeobjs = []
+        for me in (codepieces, airgaps):
+            codeobj = bpy.data.objects.new(me.name, me)
+            codeobj["markers"] = count
+            bpy.context.collection.objects.link(codeobj)
+            scratch.keep(codeobj)
+            codeobjs.append(codeobj)
+
+        ####### EXPORT #######
+
+        if self.exportdir:
+            export_embedded(ORIG_OBJ, [codeobjs[0]], [codeobjs[1]], bpy.path.abspath(self.exportdir), ORIG_OBJ.name)
+
+        return {'FINISHED'}
+
+
+
+
+
+ 
+def menu_func(self, context):
+    self.layout.operator(OBJECT_OT_optimalembed.bl_idname)
+    
+def register():
+    bpy.utils.register_class(OBJECT_OT_optimalembed)
+    bpy.types.VIEW3D_MT_object.append(menu_func)
+    
+def unregister():
+    bpy.utils.unregister_class(OBJECT_OT_optimalembed)
+    bpy.types.VIEW3D_MT_object.remove(menu_func)
+    
+if __name__ == "__main__":
+    register()
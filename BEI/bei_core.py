@@ -0,0 +1,1859 @@
+"""
+Blender-independent core of the BrightMarker Embedding Interface.
+
+Everything here works on plain NumPy arrays: finding flat patches, flattening and rasterizing
+them, searching for marker squares, spreading markers over a surface, building ArUco geometry,
+solidifying projected codes and writing printable files. plan_placements turns a mesh and the BEI
+settings into a list of MarkerPlacement, which the add-on (__init__.py) projects onto the model in
+Blender. The module needs nothing but NumPy and imports nothing from the add-on, so it can be
+profiled, tested and run outside Blender.
+"""
+
+import hashlib
+import io
+import math
+import os
+import zipfile
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+####### MESH ARRAYS #######
+
+class MeshArrays:
+    """
+    A polygon mesh as plain NumPy arrays.
+
+    Faces are stored one after another in loop_verts, loop_total[i] loops for face i. Triangles
+    can be given (e.g. Blender's loop triangles), otherwise every face is fan triangulated.
+    Everything derived from the faces lives in the mesh's MeshIndex, see mesh_index.
+    """
+
+    def __init__(self, co, loop_verts, loop_total, tri_verts=None, tri_face=None):
+        self.co = np.asarray(co, float).reshape(-1, 3)
+        self.loop_verts = np.asarray(loop_verts, np.int64)
+        self.loop_total = np.asarray(loop_total, np.int64)
+        self.loop_start = np.cumsum(self.loop_total) - self.loop_total
+        self.loop_face = np.repeat(np.arange(len(self.loop_total)), self.loop_total)
+        if tri_verts is None:
+            ## Fan out from the first loop of every face
+            fans = np.maximum(self.loop_total - 2, 0)
+            tri_face = np.repeat(np.arange(len(self.loop_total)), fans)
+            step = np.arange(fans.sum()) - np.repeat(np.cumsum(fans) - fans, fans) + 1
+            first = self.loop_start[tri_face]
+            tri_verts = self.loop_verts[np.stack([first, first + step, first + step + 1], axis=1)]
+        self.tri_verts = np.asarray(tri_verts, np.int64).reshape(-1, 3)
+        self.tri_face = np.asarray(tri_face, np.int64)
+        self.fingerprint = None
+
+    def triangles(self):
+        """
+        Returns the triangles of the mesh.
+
+        Input:
+            None
+        Return:
+            tris (Numpy array of shape (triangles, 3, 3), vertex coordinates of each triangle)
+        """
+        return self.co[self.tri_verts]
+
+def mesh_fingerprint(mesh):
+    """
+    Hashes the vertex positions and face layout of a mesh, once per MeshArrays.
+
+    Input:
+        mesh (MeshArrays)
+    Return:
+        digest (str, equal for meshes with identical geometry)
+    """
+    if mesh.fingerprint is None:
+        digest = hashlib.sha1(mesh.co.astype(np.float32).tobytes())
+        digest.update(mesh.loop_verts.astype(np.int32).tobytes())
+        digest.update(mesh.loop_total.astype(np.int32).tobytes())
+        mesh.fingerprint = digest.hexdigest()
+
+    return mesh.fingerprint
+
+class MeshIndex:
+    """
+    Face data of a mesh that every analysis stage shares, as contiguous arrays.
+
+    Holds the normal, area and center of every face, the edges, every pair of faces that share an
+    edge with the dihedral angle between them, and the same links as a CSR graph:
+    the neighbours of face i are neighbours[indptr[i]:indptr[i + 1]], bent by neighbour_angle.
+    """
+
+    def __init__(self, mesh):
+        facecount = len(mesh.loop_total)
+        loop_next = polygon_loops(mesh.loop_total)[1]
+        ## Every loop runs along the edge to the next loop of its face
+        count = max(len(mesh.co), 1)
+        start, end = mesh.loop_verts, mesh.loop_verts[loop_next]
+        edges, edge_index = np.unique(np.minimum(start, end) * count + np.maximum(start, end), return_inverse=True)
+        self.edge_index = edge_index.reshape(-1)
+        self.edge_verts = np.stack([edges // count, edges % count], axis=1)
+        ## Newell normals, their length is twice the face area
+        cross = np.cross(mesh.co[start], mesh.co[end])
+        newell = np.stack([np.bincount(mesh.loop_face, weights=cross[:, axis], minlength=facecount) for axis in range(3)], axis=1)
+        lengths = np.linalg.norm(newell, axis=1)
+        self.normals = newell / np.where(lengths > 0, lengths, 1)[:, None]
+        self.areas = lengths / 2
+        self.centers = np.stack([np.bincount(mesh.loop_face, weights=mesh.co[mesh.loop_verts, axis], minlength=facecount) for axis in range(3)], axis=1) / np.maximum(mesh.loop_total, 1)[:, None]
+        ## Sort loops by edge so that faces sharing an edge end up next to each other
+        order = np.argsort(self.edge_index, kind="stable")
+        edges = self.edge_index[order]
+        faces = mesh.loop_face[order]
+        shared = edges[1:] == edges[:-1]
+        self.pair_a = faces[:-1][shared]
+        self.pair_b = faces[1:][shared]
+        self.link_angle = np.arccos(np.clip(np.einsum("ij,ij->i", self.normals[self.pair_a], self.normals[self.pair_b]), -1, 1))
+        ## Both directions of every link, grouped by the face they start from
+        source = np.concatenate([self.pair_a, self.pair_b])
+        order = np.argsort(source, kind="stable")
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(source, minlength=facecount))])
+        self.neighbours = np.concatenate([self.pair_b, self.pair_a])[order]
+        self.neighbour_angle = np.concatenate([self.link_angle, self.link_angle])[order]
+
+## Indexes of recently analyzed meshes, keyed by mesh_fingerprint
+mesh_indexes = dict()
+
+def mesh_index(mesh):
+    """
+    Returns the MeshIndex of a mesh, building it only if this geometry hasn't been seen.
+
+    Input:
+        mesh (MeshArrays)
+    Return:
+        MeshIndex of mesh
+    """
+    key = mesh_fingerprint(mesh)
+    if key not in mesh_indexes:
+        ## Only keep a few meshes around
+        if len(mesh_indexes) >= 8:
+            del mesh_indexes[next(iter(mesh_indexes))]
+        mesh_indexes[key] = MeshIndex(mesh)
+
+    return mesh_indexes[key]
+
+####### FLAT PATCHES #######
+
+def label_components(count, pair_a, pair_b):
+    """
+    Labels the connected components of a graph given as a list of links.
+
+    Input:
+        count (int number of nodes)
+        pair_a, pair_b (Numpy arrays of node indices, each pair is a link)
+    Return:
+        labels (Numpy array, the smallest node index in each node's component)
+    """
+    labels = np.arange(count)
+    while True:
+        la = labels[pair_a]
+        lb = labels[pair_b]
+        differ = la != lb
+        if not differ.any():
+            return labels
+        ## Hook the larger root of every unmerged link onto the smaller one
+        np.minimum.at(labels, np.maximum(la[differ], lb[differ]), np.minimum(la[differ], lb[differ]))
+        ## Jump pointers until every node points straight at its root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels): break
+            labels = jumped
+
+def group_faces(labels, seeds, areas):
+    """
+    Groups face indices by component label, keeping only components that contain a seed face.
+
+    Input:
+        labels (Numpy array of component labels, one per face)
+        seeds (Numpy bool array, True for faces that may start a patch)
+        areas (Numpy array of face areas)
+    Return:
+        out (list of (area, face indices) sorted from largest to smallest area)
+    """
+    count = len(labels)
+    sizes = np.bincount(labels, weights=areas, minlength=count)
+    ## Order components by their first seed face, like a scan over the faces would find them
+    first_seed = np.full(count, count)
+    np.minimum.at(first_seed, labels[seeds], np.nonzero(seeds)[0])
+    found = np.nonzero(first_seed < count)[0]
+    found = found[np.argsort(first_seed[found], kind="stable")]
+    found = found[np.argsort(-sizes[found], kind="stable")]
+    ## Split the faces into their components
+    order = np.argsort(labels, kind="stable")
+    starts = np.searchsorted(labels[order], found)
+    ends = np.searchsorted(labels[order], found, side="right")
+
+    return [(sizes[lab], order[start:end]) for lab, start, end in zip(found, starts, ends)]
+
+class PatchHierarchy:
+    """
+    Merge tree of the faces of a mesh, built once and queried for any sharpness.
+
+    Links between neighbouring faces are sorted by the angle between the faces and merged
+    Kruskal-style. Only the links that join two separate groups are kept, so the patches for a
+    sharpness value are the components of the kept links at or below that angle.
+    """
+
+    def __init__(self, normals, areas, pair_a, pair_b, angles=None):
+        self.normals = normals
+        self.areas = areas
+        if angles is None:
+            angles = np.arccos(np.clip(np.einsum("ij,ij->i", normals[pair_a], normals[pair_b]), -1, 1))
+        order = np.argsort(angles, kind="stable")
+        ## Union-find over the links from flattest to sharpest
+        parent = list(range(len(areas)))
+        merges = []
+        for link, a, b in zip(order.tolist(), pair_a[order].tolist(), pair_b[order].tolist()):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            while parent[b] != b:
+                parent[b] = parent[parent[b]]
+                b = parent[b]
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+                merges.append(link)
+        self.merge_a = pair_a[merges]
+        self.merge_b = pair_b[merges]
+        self.merge_angle = angles[merges]
+
+    def patches(self, sharpnessval, ignorebottom):
+        """
+        Reads the flat patches for a sharpness value off the merge tree.
+
+        Input:
+            sharpnessval (float, lower value means patches must be flatter)
+            ignorebottom (bool, True if the bottom should be ignored)
+        Return:
+            out (list of (area, face indices) sorted from largest to smallest area)
+        """
+        merged = np.searchsorted(self.merge_angle, sharpnessval, side="right")
+        labels = label_components(len(self.areas), self.merge_a[:merged], self.merge_b[:merged])
+        ## If ignoring bottom, faces within 15 degrees (0.26 radians) of the bottom can't start a patch
+        seeds = np.ones(len(self.areas), bool)
+        if ignorebottom:
+            seeds = -self.normals[:, 2] <= math.cos(0.26)
+
+        return group_faces(labels, seeds, self.areas)
+
+## How far (radians) the faces of a proxy cluster may bend at first, proxy patches are exact for any sharpness at least this large
+proxy_angle = 0.02
+## Sharpest bend a proxy cluster may take in to get down to its size on noisy meshes, below real creases
+proxy_max_angle = math.pi / 4
+
+def proxy_clusters(index, maxfaces):
+    """
+    Groups the faces of a mesh into clusters of connected faces that lie in the same grid cell.
+    Faces first only join across bends of up to proxy_angle. If that leaves more than twice
+    maxfaces clusters, as on noisy scans where neighbouring faces rarely line up, the allowed bend
+    is doubled until it doesn't or until it would pass proxy_max_angle.
+
+    Input:
+        index (MeshIndex)
+        maxfaces (int, about how many clusters to make)
+    Return:
+        labels (Numpy array, the cluster of every face, numbered from 0)
+        angle (float, the sharpest bend inside a cluster)
+    """
+    ## Cells sized so that the surface crosses about maxfaces / 2 of them, every cell holds one or more clusters
+    cell = math.sqrt(2 * index.areas.sum() / maxfaces)
+    voxels = np.floor(index.centers / cell).astype(np.int64)
+    same = (voxels[index.pair_a] == voxels[index.pair_b]).all(axis=1)
+    angle = proxy_angle
+    while True:
+        inside = same & (index.link_angle <= angle)
+        labels = label_components(len(index.areas), index.pair_a[inside], index.pair_b[inside])
+        roots = labels == np.arange(len(labels))
+        if np.count_nonzero(roots) <= 2 * maxfaces or angle * 2 > proxy_max_angle:
+            break
+        angle *= 2
+    ## Number the clusters by their root face
+    number = np.cumsum(roots) - 1
+
+    return number[labels], angle
+
+class ProxyHierarchy:
+    """
+    Patch hierarchy of a light proxy of a mesh, for meshes too detailed to analyze face by face.
+
+    The faces are grouped into clusters by proxy_clusters. Two clusters are linked at the smallest
+    angle between any of their neighbouring faces and merged like faces, so the proxy's patches are
+    the full mesh's patches for every sharpness of at least self.angle, and are made of whole
+    clusters below it. Like PatchHierarchy it is built once and queried for any sharpness. Patches
+    are handed back as faces of the full mesh, so flattening and rasterizing still use the real
+    surface.
+    """
+
+    def __init__(self, index, maxfaces, clusters=None):
+        normals, areas, pair_a, pair_b = index.normals, index.areas, index.pair_a, index.pair_b
+        self.labels, self.angle = clusters if clusters is not None else proxy_clusters(index, maxfaces)
+        labels = self.labels
+        count = labels.max() + 1
+        ## Each cluster is one proxy face with the area weighted normal of its faces
+        proxy_areas = np.bincount(labels, weights=areas, minlength=count)
+        proxy_normals = np.zeros((count, 3))
+        np.add.at(proxy_normals, labels, normals * areas[:, None])
+        lengths = np.linalg.norm(proxy_normals, axis=1)
+        proxy_normals /= np.where(lengths > 0, lengths, 1)[:, None]
+        ## Clusters are neighbours if any of their faces are, at the flattest bend between them
+        links = np.sort(np.stack([labels[pair_a], labels[pair_b]], axis=1), axis=1)
+        across = links[:, 0] != links[:, 1]
+        links, angles = links[across], index.link_angle[across]
+        order = np.lexsort((angles, links[:, 1], links[:, 0]))
+        links, angles = links[order], angles[order]
+        first = np.ones(len(links), bool)
+        first[1:] = (links[1:] != links[:-1]).any(axis=1)
+        self.hierarchy = PatchHierarchy(proxy_normals, proxy_areas, links[first, 0], links[first, 1], angles[first])
+
+    def patches(self, sharpnessval, ignorebottom):
+        """
+        Reads the flat patches for a sharpness value off the proxy, as faces of the full mesh.
+
+        Input:
+            sharpnessval (float, lower value means patches must be flatter)
+            ignorebottom (bool, True if the bottom should be ignored)
+        Return:
+            out (list of (area, face indices) sorted from largest to smallest area)
+        """
+        groups = self.hierarchy.patches(sharpnessval, ignorebottom)
+        ## Patch of every cluster, then of every face, -1 for faces left out by ignorebottom
+        cluster_patch = np.full(len(self.hierarchy.areas), -1)
+        for num, (size, group) in enumerate(groups):
+            cluster_patch[group] = num
+        face_patch = cluster_patch[self.labels]
+        order = np.argsort(face_patch, kind="stable")
+        ends = np.searchsorted(face_patch[order], np.arange(len(groups) + 1))
+
+        return [(size, order[start:end]) for (size, group), start, end in zip(groups, ends[:-1], ends[1:])]
+
+## Patch hierarchies of recently analyzed meshes, keyed by mesh_fingerprint
+patch_hierarchies = dict()
+
+def get_patch_hierarchy(mesh, maxfaces=None):
+    """
+    Returns the patch hierarchy of a mesh, building it only if this geometry hasn't been seen.
+    Neither hierarchy depends on the sharpness, so changing it reuses the cached one.
+
+    Input:
+        mesh (MeshArrays)
+        maxfaces (int, meshes with more faces are analyzed on a proxy of up to about 2 * maxfaces clusters, None for never)
+    Return:
+        ProxyHierarchy if mesh has more than maxfaces faces and the proxy at least halves them, else PatchHierarchy of mesh
+    """
+    proxy = maxfaces is not None and len(mesh.loop_total) > maxfaces
+    key = (mesh_fingerprint(mesh), maxfaces) if proxy else mesh_fingerprint(mesh)
+    if key not in patch_hierarchies:
+        ## Only keep a few meshes around
+        if len(patch_hierarchies) >= 8:
+            del patch_hierarchies[next(iter(patch_hierarchies))]
+        index = mesh_index(mesh)
+        clusters = proxy_clusters(index, maxfaces) if proxy else None
+        ## A proxy that barely shrinks the mesh is slower than analyzing the faces themselves
+        if proxy and clusters[0].max() + 1 <= len(index.areas) // 2:
+            patch_hierarchies[key] = ProxyHierarchy(index, maxfaces, clusters)
+        else:
+            patch_hierarchies[key] = PatchHierarchy(index.normals, index.areas, index.pair_a, index.pair_b, index.link_angle)
+
+    return patch_hierarchies[key]
+
+def angle_between_norms(v1, v2):
+    """
+    Finds the angle between two 3-dimensional normal vectors in degrees.
+    
+    Input:
+        v1 (tuple of length 3)
+        v2 (tuple of length 3)
+    Return:
+        ang (float)
+    """
+    dotprod = np.dot(v1, v2)
+    ## Get rid of tiny decimals that don't fall in math.acos() bounds
+    dotprod = min(dotprod, 1)
+    dotprod = max(dotprod, -1)
+    ## We know the magnitude of the norms will be 1
+    ang = math.acos(dotprod)
+        
+    return ang
+
+def grow_patch(index, seed, sharpnessval, maxangle, maxdist):
+    """
+    Grows a patch of connected, approximately flat faces out from a face, breadth first.
+
+    A face joins the patch if it shares an edge with a face of the patch, bends by no more than
+    sharpnessval from that face (like faces_select_linked_flat), is within maxangle of the seed face
+    and has its center within maxdist of the seed's. Only the faces of the patch and their neighbours are visited.
+
+    Input:
+        index (MeshIndex of the mesh)
+        seed (int index of the face the patch starts from)
+        sharpnessval (float radians, lower value means patches must be flatter)
+        maxangle (float radians, how far a face may turn from the seed face)
+        maxdist (float, how far a face center may be from the seed's)
+    Return:
+        patch (list of face indices, starting with seed)
+    """
+    patch = [seed]
+    seen = {seed}
+    ## The patch list doubles as the queue of faces whose neighbours are still to be checked
+    for face in patch:
+        start, end = index.indptr[face], index.indptr[face + 1]
+        ## A face too sharp from this neighbour may still join through a flatter one
+        flat = index.neighbour_angle[start:end] <= sharpnessval
+        for f in index.neighbours[start:end][flat].tolist():
+            if f in seen:
+                continue
+            seen.add(f)
+            if abs(angle_between_norms(index.normals[seed], index.normals[f])) > maxangle:
+                continue
+            if np.linalg.norm(index.centers[f] - index.centers[seed]) > maxdist:
+                continue
+            patch.append(f)
+
+    return patch
+
+####### FLATTENING AND RASTERIZING #######
+
+def flatten_patch(tris):
+    """
+    Fits a plane to the triangles of a patch and lays the patch flat on it.
+
+    The plane goes through the area weighted center of the patch. Its axes are the principal axes
+    of the patch, so the normal is the direction the patch varies least in (turned to face the same
+    way as the faces) and X runs along the patch's longest extent.
+
+    Input:
+        tris (Numpy array of shape (triangles, 3, 3), world coordinates)
+    Return:
+        flat (Numpy array of shape (triangles, 3, 3), the triangles in the plane's frame with z = 0)
+        frame (Numpy array of shape (4, 4), taking the plane's frame to world coordinates)
+    """
+    cross = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    ## Each corner carries a third of its triangle's area
+    weights = np.repeat(np.linalg.norm(cross, axis=1) / 6, 3)
+    total = max(weights.sum(), 1e-12)
+    points = tris.reshape(-1, 3)
+    center = weights @ points / total
+    offsets = points - center
+    ## Eigenvectors of the covariance, from least to most spread
+    axes = np.linalg.eigh((offsets * weights[:, None]).T @ offsets / total)[1]
+    normal = axes[:, 0]
+    if normal @ cross.sum(axis=0) < 0:
+        normal = -normal
+    basis = np.stack([axes[:, 2], np.cross(normal, axes[:, 2]), normal], axis=1)
+    flat = (offsets @ basis).reshape(-1, 3, 3)
+    flat[:, :, 2] = 0
+
+    frame = np.eye(4)
+    frame[:3, :3] = basis
+    frame[:3, 3] = center
+
+    return flat, frame
+
+def triangle_spans(tris, dimx, dimy, interval, startloc):
+    """
+    Cuts a set of triangles into the runs of grid points they cover along each grid row.
+
+    Input:
+        tris (Numpy array of shape (triangles, 3, 2 or 3), only x and y are used)
+        dimx (int width of grid)
+        dimy (int height of the grid)
+        interval (float distance between grid points)
+        startloc (tuple len 3 location of grid point (0, 0) - this should be -x +y corner of patch bounding box)
+    Return:
+        (row, start, end) (Numpy int arrays, each span covers columns start to end inclusive of its row)
+    """
+    xs = tris[:, :, 0]
+    ys = tris[:, :, 1]
+    ## Grid rows covered by each triangle (row y is at startloc[1] - y * interval)
+    first = np.maximum(np.ceil((startloc[1] - ys.max(axis=1)) / interval), 0).astype(int)
+    last = np.minimum(np.floor((startloc[1] - ys.min(axis=1)) / interval), dimy - 1).astype(int)
+    counts = np.maximum(last - first + 1, 0)
+    ## One entry per (triangle, row) pair
+    tri = np.repeat(np.arange(len(tris)), counts)
+    row = first[tri] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    rowy = startloc[1] - row * interval
+    ## Leftmost and rightmost x where each row crosses the edges of its triangle
+    left = np.full(len(row), np.inf)
+    right = np.full(len(row), -np.inf)
+    for i in range(3):
+        x0, y0 = xs[tri, i], ys[tri, i]
+        x1, y1 = xs[tri, (i + 1) % 3], ys[tri, (i + 1) % 3]
+        crosses = (rowy >= np.minimum(y0, y1)) & (rowy <= np.maximum(y0, y1))
+        flat = y0 == y1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = x0 + (rowy - y0) / (y1 - y0) * (x1 - x0)
+        ## An edge lying along the row covers both of its endpoints
+        left = np.where(crosses, np.minimum(left, np.where(flat, np.minimum(x0, x1), x)), left)
+        right = np.where(crosses, np.maximum(right, np.where(flat, np.maximum(x0, x1), x)), right)
+    ## Grid columns inside each span
+    start = np.maximum(np.ceil((left - startloc[0]) / interval), 0)
+    end = np.minimum(np.floor((right - startloc[0]) / interval), dimx - 1)
+    spans = start <= end
+
+    return row[spans], start[spans].astype(int), end[spans].astype(int)
+
+def fill_spans(row, start, end, dimx, dimy):
+    """
+    Fills runs of grid points into a 2D Numpy bool array.
+
+    Input:
+        (row, start, end) (Numpy int arrays, each span covers columns start to end inclusive of its row)
+        dimx (int width of array)
+        dimy (int height of the array)
+    Return:
+        filled (2D Numpy bool array)
+    """
+    ## +1 where a span starts, -1 just after it ends, then a running sum per row
+    width = dimx + 1
+    diff = np.bincount(row * width + start, minlength=dimy * width) - np.bincount(row * width + end + 1, minlength=dimy * width)
+
+    return np.cumsum(diff.reshape(dimy, width), axis=1)[:, :dimx] > 0
+
+def rasterize_triangles(tris, dimx, dimy, interval, startloc):
+    """
+    Marks the grid points covered by a set of triangles, looking down the Z axis.
+
+    Every triangle is cut into spans along the grid rows it covers, and the spans are filled
+    for all triangles at once.
+
+    Input:
+        tris (Numpy array of shape (triangles, 3, 2 or 3), only x and y are used)
+        dimx (int width of array)
+        dimy (int height of the array)
+        interval (float distance between grid points)
+        startloc (tuple len 3 location of grid point (0, 0) - this should be -x +y corner of patch bounding box)
+    Return:
+        patcharray (2D Numpy bool array, patcharray[y][x] is True if the point is covered)
+    """
+    row, start, end = triangle_spans(tris, dimx, dimy, interval, startloc)
+
+    return fill_spans(row, start, end, dimx, dimy)
+
+class OccupancyQuadtree:
+    """
+    Adaptive occupancy of a flattened patch on the same grid rasterize_triangles would sample.
+
+    Square cells are classified as fully inside, fully outside or mixed, and only the mixed cells
+    are split, down to single grid points. Classification reads the covered runs of each grid row,
+    so memory and build time follow the patch outline instead of its area.
+    """
+
+    def __init__(self, tris, dimx, dimy, interval, startloc):
+        self.dimx = dimx
+        self.dimy = dimy
+        self.interval = interval
+        self.startloc = startloc
+        ## Merge the triangle spans of each row into disjoint runs
+        row, start, end = triangle_spans(tris, dimx, dimy, interval, startloc)
+        order = np.lexsort((start, row))
+        row, start, end = row[order], start[order], end[order]
+        width = dimx + 1
+        reach = np.maximum.accumulate(row * width + end) - row * width
+        newrun = np.ones(len(row), bool)
+        newrun[1:] = (row[1:] != row[:-1]) | (start[1:] > reach[:-1] + 1)
+        lastofrun = np.append(np.nonzero(newrun)[0][1:] - 1, len(row) - 1)
+        self.run_row = row[newrun]
+        self.run_start = start[newrun]
+        self.run_end = reach[lastofrun] if len(row) else end
+        self.run_key = self.run_row * width + self.run_start
+        ## A patch thinner than the grid spacing can miss every grid point, then there is nothing to split
+        if not len(self.run_row):
+            self.leaf_row, self.leaf_col, self.leaf_size = (np.zeros(0, int) for _ in range(3))
+            return
+        ## Split cells from the root down, keeping the fully inside ones as leaves
+        leaves = []
+        level = max(int(np.ceil(np.log2(max(dimx, dimy, 1)))), 0)
+        rows = np.zeros(1, int)
+        cols = np.zeros(1, int)
+        while len(rows):
+            size = 1 << level
+            inside, outside = self.classify(rows * size, cols * size, size)
+            leaves.append((rows[inside] * size, cols[inside] * size, np.full(inside.sum(), size)))
+            mixed = ~inside & ~outside
+            if not mixed.any(): break
+            rows = np.repeat(rows[mixed] * 2, 4) + np.tile([0, 0, 1, 1], mixed.sum())
+            cols = np.repeat(cols[mixed] * 2, 4) + np.tile([0, 1, 0, 1], mixed.sum())
+            level -= 1
+            keep = (rows << level < dimy) & (cols << level < dimx)
+            rows, cols = rows[keep], cols[keep]
+        self.leaf_row, self.leaf_col, self.leaf_size = (np.concatenate(part) for part in zip(*leaves))
+
+    def find_run(self, rows, cols):
+        """
+        Finds, for each grid point, the last run of its row starting at or before it.
+
+        Input:
+            rows, cols (Numpy int arrays of grid indices)
+        Return:
+            (run, found) (Numpy arrays, run indices and whether such a run exists)
+        """
+        run = np.searchsorted(self.run_key, rows * (self.dimx + 1) + cols, side="right") - 1
+        found = run >= 0
+        run = np.maximum(run, 0)
+        if len(self.run_row):
+            found &= self.run_row[run] == rows
+        else:
+            found[:] = False
+
+        return run, found
+
+    def classify(self, row0, col0, size):
+        """
+        Classifies square cells of grid points.
+
+        Input:
+            row0, col0 (Numpy int arrays, top left grid point of each cell)
+            size (int side of the cells in grid points, cells are clipped to the grid)
+        Return:
+            (inside, outside) (Numpy bool arrays, a cell that is neither is mixed)
+        """
+        if not len(self.run_row):
+            return np.zeros(len(row0), bool), np.ones(len(row0), bool)
+        row1 = np.minimum(row0 + size, self.dimy)
+        col1 = np.minimum(col0 + size, self.dimx)
+        counts = row1 - row0
+        ## One entry per (cell, row) pair
+        cell = np.repeat(np.arange(len(row0)), counts)
+        row = row0[cell] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        ## The row is full if the run at the left edge reaches the right edge
+        run, found = self.find_run(row, col0[cell])
+        full = found & (self.run_end[run] >= col1[cell] - 1)
+        ## The row is touched if the last run starting before the right edge reaches the left edge
+        run, found = self.find_run(row, col1[cell] - 1)
+        touched = found & (self.run_end[run] >= col0[cell])
+        inside = np.bincount(cell, weights=full, minlength=len(row0)) == counts
+        outside = np.bincount(cell, weights=touched, minlength=len(row0)) == 0
+
+        return inside, outside
+
+    def window(self, row0, row1, col0, col1):
+        """
+        Materializes part of the grid as a dense array.
+
+        Input:
+            row0, row1 (int rows of the window, row1 exclusive)
+            col0, col1 (int columns of the window, col1 exclusive)
+        Return:
+            2D Numpy bool array of shape (row1 - row0, col1 - col0)
+        """
+        row0, col0 = max(row0, 0), max(col0, 0)
+        row1, col1 = min(row1, self.dimy), min(col1, self.dimx)
+        first, last = np.searchsorted(self.run_row, [row0, row1])
+        start = np.maximum(self.run_start[first:last], col0)
+        end = np.minimum(self.run_end[first:last], col1 - 1)
+        spans = start <= end
+
+        return fill_spans(self.run_row[first:last][spans] - row0, start[spans] - col0, end[spans] - col0, col1 - col0, row1 - row0)
+
+    def to_array(self, level=0):
+        """
+        Materializes the grid, optionally at a coarser level.
+
+        Input:
+            level (int, each output cell covers 2**level by 2**level grid points)
+        Return:
+            2D Numpy bool array, a cell is True only if all of its grid points are covered
+        """
+        scale = 1 << level
+        dimy, dimx = -(-self.dimy // scale), -(-self.dimx // scale)
+        big = self.leaf_size >= scale
+        row0 = self.leaf_row[big] // scale
+        col0 = self.leaf_col[big] // scale
+        size = self.leaf_size[big] // scale
+        ## Each leaf covers its block of rows with one span
+        counts = size
+        leaf = np.repeat(np.arange(len(row0)), counts)
+        row = row0[leaf] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        start = col0[leaf]
+        end = col0[leaf] + size[leaf] - 1
+        spans = row < dimy
+
+        return fill_spans(row[spans], start[spans], np.minimum(end[spans], dimx - 1), dimx, dimy)
+
+    def largest_squares(self, k, gap=0, max_cells=512 * 512, maxside=None):
+        """
+        Finds the k largest non-overlapping squares of covered grid points without materializing
+        the whole grid.
+
+        The search runs on the coarsest level that fits in max_cells, then each coarse square is
+        refined on a full resolution window around it. Coarse squares are kept far enough apart
+        that their windows, and so the refined squares, can't overlap.
+
+        Input:
+            k (int maximum number of squares)
+            gap (int number of grid points to keep clear between squares)
+            max_cells (int, largest dense array to build)
+            maxside (int largest side to give a square in grid points, or None)
+        Return:
+            list of [(coordinates of bottom right of square), side length], as largest_interior_squares
+        """
+        level = 0
+        while -(-self.dimy >> level) * -(-self.dimx >> level) > max_cells:
+            level += 1
+        if level == 0:
+            return largest_interior_squares(self.to_array(), k, gap, maxside)
+        scale = 1 << level
+        squares = []
+        coarseside = None if maxside is None else -(-maxside // scale)
+        for (brx, bry), s in largest_interior_squares(self.to_array(level), k, -(-gap // scale) + 2, coarseside):
+            ## Coarse square in grid points, padded by one coarse cell on each side
+            row0, col0 = (bry - s) * scale, (brx - s) * scale
+            row1, col1 = (bry + 2) * scale, (brx + 2) * scale
+            (fbrx, fbry), fs = largest_interior_square(self.window(row0, row1, col0, col1), maxside)
+            squares.append([(fbrx + max(col0, 0), fbry + max(row0, 0)), fs])
+        squares.sort(key=lambda sq: sq[1], reverse=True)
+
+        return squares
+
+    def rotated_squares(self, k, angles, max_cells=4 * 1024 * 1024, maxside=None):
+        """
+        Finds the best rotation for squares of covered grid points and the k largest squares at it,
+        see rotated_squares.
+
+        When all rotations don't fit in max_cells, the rotation and the squares are found on the
+        coarsest level that fits, then each square is refined at full resolution in a window
+        around it. Coarse squares are kept far enough apart that the refined squares can't overlap.
+
+        Input:
+            k (int maximum number of squares)
+            angles (1D numpy array of candidate angles in radians)
+            max_cells (int, largest stack of rotated grids to build)
+            maxside (int largest side to give a square in grid points, or None)
+        Return:
+            list of (angle, (row, col) center, side length), as rotated_squares
+        """
+        level = 0
+        while len(angles) * (np.hypot(-(-self.dimy >> level), -(-self.dimx >> level)) + 2) ** 2 > max_cells:
+            level += 1
+        if level == 0:
+            return rotated_squares(self.to_array(), k, angles, maxside)
+        scale = 1 << level
+        coarseside = None if maxside is None else -(-maxside // scale)
+        squares = []
+        for angle, (row, col), s in rotated_squares(self.to_array(level), k, angles, coarseside, gap=3):
+            ## Search the coarse square, padded by one coarse cell on each side, at full resolution
+            reach = math.ceil((s + 2) * scale / 2)
+            radius = math.ceil(reach * math.sqrt(2)) + 1
+            row, col = round(row * scale + (scale - 1) / 2), round(col * scale + (scale - 1) / 2)
+            found = rotated_squares(self.centered_window(row, col, radius), 1, [-angle], maxside, reach=reach)
+            for fangle, (frow, fcol), fs in found:
+                squares.append((fangle, (frow + row - radius, fcol + col - radius), fs))
+        squares.sort(key=lambda sq: sq[2], reverse=True)
+
+        return squares
+
+    def centered_window(self, row, col, radius):
+        """
+        Materializes the square of the grid within radius of a grid point, with the grid points
+        past the edge of the grid left uncovered.
+
+        Input:
+            row, col (int grid point at the center)
+            radius (int)
+        Return:
+            2D Numpy bool array of shape (2 * radius + 1, 2 * radius + 1)
+        """
+        out = np.zeros((2 * radius + 1, 2 * radius + 1), bool)
+        part = self.window(row - radius, row + radius + 1, col - radius, col + radius + 1)
+        row0, col0 = max(radius - row, 0), max(radius - col, 0)
+        out[row0:row0 + part.shape[0], col0:col0 + part.shape[1]] = part
+
+        return out
+
+    def pack_squares(self, side, pitch, margin=1, max_cells=512 * 512):
+        """
+        Packs as many squares as possible into the covered grid points, see pack_squares, a band of
+        rows at a time so that no more than about max_cells grid points are materialized at once.
+
+        Input:
+            side (float side of the squares in grid points)
+            pitch (float smallest distance between square centers in grid points)
+            margin (int grid points to keep clear around each square)
+            max_cells (int, largest dense array to build)
+        Return:
+            points (list of (row, col) square centers)
+        """
+        need = int(side / 2) + 1 + margin
+        step = max(int(np.ceil(pitch)), 1)
+        band = max(max_cells // max(self.dimx, 1) - 2 * need, 1)
+        rowcols = []
+        for row0 in range(0, self.dimy, band):
+            row1 = min(row0 + band, self.dimy)
+            ## Pad the band by need rows, which is all the clearance test looks at
+            top = min(need, row0)
+            window = self.window(row0 - top, row1 + need, 0, self.dimx)
+            rowcols += row_fits(clearance_map(window)[top:top + row1 - row0] >= need, step)
+
+        return choose_rows(rowcols, step)
+
+def indices_to_coords(startloc, interval, row, col):
+    """
+    Calculate the real coords from a start location, interval, and index.
+    """
+    res = (startloc[0] + col*interval, startloc[1] - row*interval, 0)
+    return res
+
+####### INTERIOR SQUARES #######
+
+def square_table(M):
+    """
+    Finds the side of the largest square of 1s ending (bottom right) at every cell of an array.
+
+    Uses S[i][j] = min(S[i-1][j-1] + 1, run of 1s up from (i, j), run of 1s left from (i, j)),
+    which only depends on the previous row, so each row is computed in one vectorized step.
+
+    Input:
+        M (numpy array of 1s and 0s, 2D or a stack of 2D arrays along leading axes)
+    Return:
+        S (numpy int array, same shape as M)
+    """
+    M = np.asarray(M, bool)
+    rows, cols = M.shape[-2:]
+    S = np.zeros(M.shape, np.int32)
+    colidx = np.arange(cols)
+    up = np.zeros(M.shape[:-2] + (cols,), np.int32)
+    diag = np.ones(M.shape[:-2] + (cols,), np.int32)
+    for i in range(rows):
+        line = M[..., i, :]
+        up = np.where(line, up + 1, 0)
+        left = colidx - np.maximum.accumulate(np.where(line, -1, colidx), axis=-1)
+        S[..., i, :] = np.minimum(np.minimum(up, left), diag)
+        diag[..., 1:] = S[..., i, :-1] + 1
+
+    return S
+
+def largest_interior_squares(M, k, gap=0, maxside=None):
+    """
+    Finds the k largest non-overlapping squares of 1s in an array of 1s and 0s, largest first.
+
+    Input:
+        M (2D numpy array)
+        k (int maximum number of squares)
+        gap (int number of cells to keep clear between squares)
+        maxside (int largest side to give a square, so that one square can't take the room of several, or None)
+    Return:
+        list of [(coordinates of bottom right of square), side length]
+    """
+    M = np.array(M, bool)
+    ## The first row and column never end a square, as in the original scan
+    M[0, :] = False
+    M[:, 0] = False
+    squares = []
+    for _ in range(k):
+        S = square_table(M)
+        if maxside is not None:
+            S = np.minimum(S, maxside)
+        i, j = np.unravel_index(np.argmax(S), S.shape)
+        s = int(S[i, j])
+        if s == 0: break
+        squares.append([(int(j), int(i)), s])
+        ## Clear the square and the gap around it so later squares can't overlap it
+        M[max(i - s + 1 - gap, 0):i + 1 + gap, max(j - s + 1 - gap, 0):j + 1 + gap] = False
+
+    return squares
+
+def clearance_map(M):
+    """
+    Finds the Chebyshev distance from every cell of an array to the nearest 0 (outside the array counts as 0).
+
+    A value of r means a square of side 2r - 1 centered on the cell holds only 1s. The centered
+    square is the union of four squares of side r cornered at the cell, one per quadrant, so r is
+    the smallest of the four square tables.
+
+    Input:
+        M (2D numpy array of 1s and 0s)
+    Return:
+        clearance (2D numpy int array, same shape as M)
+    """
+    M = np.asarray(M, bool)
+
+    return np.minimum.reduce([
+        square_table(M),
+        square_table(M[::-1])[::-1],
+        square_table(M[:, ::-1])[:, ::-1],
+        square_table(M[::-1, ::-1])[::-1, ::-1],
+    ])
+
+def row_fits(fits, step):
+    """
+    Fills every row of an array of possible square centers greedily from the left, which is optimal for a single row.
+
+    Input:
+        fits (2D numpy bool array, True where a square can be centered)
+        step (int smallest distance between square centers in cells)
+    Return:
+        rowcols (list of lists of the chosen columns of every row)
+    """
+    rowcols = []
+    for line in fits:
+        cols = np.flatnonzero(line)
+        chosen = []
+        ind = 0
+        while ind < len(cols):
+            chosen.append(int(cols[ind]))
+            ind = np.searchsorted(cols, cols[ind] + step)
+        rowcols.append(chosen)
+
+    return rowcols
+
+def choose_rows(rowcols, step):
+    """
+    Chooses the rows at least step apart that hold the most squares, with a dynamic program over the row totals.
+
+    Input:
+        rowcols (list of lists of the chosen columns of every row, as row_fits returns)
+        step (int smallest distance between square centers in cells)
+    Return:
+        points (list of (row, col) square centers)
+    """
+    rows = len(rowcols)
+    ## Best total using rows at least step apart: best[r] = max(best[r - 1], count[r] + best[r - step])
+    best = np.zeros(rows + 1, int)
+    for r in range(rows):
+        best[r + 1] = max(best[r], len(rowcols[r]) + best[max(r + 1 - step, 0)])
+    ## Walk back through the choices
+    points = []
+    r = rows
+    while r > 0:
+        if best[r] == best[r - 1]:
+            r -= 1
+        else:
+            points.extend((r - 1, col) for col in rowcols[r - 1])
+            r = max(r - step, 0)
+    points.reverse()
+
+    return points
+
+def pack_squares(M, side, pitch, margin=1):
+    """
+    Packs as many squares as possible into the 1s of an array.
+
+    Squares are placed in rows at least pitch apart. Each row is filled greedily from the left,
+    which is optimal for a single row, and the set of rows is chosen with a dynamic program over
+    the row totals.
+
+    Input:
+        M (2D numpy array of 1s and 0s)
+        side (float side of the squares in cells)
+        pitch (float smallest distance between square centers in cells)
+        margin (int cells to keep clear around each square)
+    Return:
+        points (list of (row, col) square centers)
+    """
+    ## A center fits if the square around it (plus margin) holds only 1s
+    fits = clearance_map(M) >= int(side / 2) + 1 + margin
+    step = max(int(np.ceil(pitch)), 1)
+
+    return choose_rows(row_fits(fits, step), step)
+
+def rotate_grid(M, angles):
+    """
+    Samples an array on copies of its grid rotated about the array center.
+
+    Input:
+        M (2D numpy array)
+        angles (1D numpy array of angles in radians, counterclockwise in the (col, row) plane)
+    Return:
+        stack (3D numpy bool array of shape (angles, D, D), D is the diagonal of M so nothing is cut off)
+    """
+    rows, cols = M.shape
+    size = int(np.ceil(np.hypot(rows, cols))) + 1
+    offset = (np.arange(size) - (size - 1) / 2).astype(np.float32)
+    cos = np.cos(angles).astype(np.float32)[:, None, None]
+    sin = np.sin(angles).astype(np.float32)[:, None, None]
+    ## Nearest grid point of M under every rotated grid point
+    srcrow = np.rint((rows - 1) / 2 + sin * offset[None, None, :] + cos * offset[None, :, None]).astype(np.int32)
+    srccol = np.rint((cols - 1) / 2 + cos * offset[None, None, :] - sin * offset[None, :, None]).astype(np.int32)
+    valid = (srcrow >= 0) & (srcrow < rows) & (srccol >= 0) & (srccol < cols)
+    stack = np.zeros(valid.shape, bool)
+    stack[valid] = np.asarray(M, bool)[srcrow[valid], srccol[valid]]
+
+    return stack
+
+def rotated_squares(M, k, angles, maxside=None, gap=0, reach=None):
+    """
+    Finds the in-plane rotation that fits the largest square of 1s, then the k largest
+    non-overlapping squares at that rotation.
+
+    All candidate rotations are sampled and searched in one batched square table.
+
+    Input:
+        M (2D numpy array of 1s and 0s)
+        k (int maximum number of squares)
+        angles (1D numpy array of candidate angles in radians, the first is preferred on ties)
+        maxside (int largest side to give a square, see largest_interior_squares)
+        gap (int number of cells to keep clear between squares)
+        reach (int, only look within this many cells of the center of M along the rotated axes, or None)
+    Return:
+        list of (angle, (row, col) center in M, side length), angle is counterclockwise seen from +Z
+        when rows run down -Y and columns along +X
+    """
+    angles = np.asarray(angles, float)
+    stack = rotate_grid(M, angles)
+    if reach is not None:
+        inner = np.abs(np.arange(stack.shape[-1]) - (stack.shape[-1] - 1) / 2) <= reach
+        stack &= inner[:, None] & inner[None, :]
+    best = int(np.argmax(square_table(stack).reshape(len(angles), -1).max(axis=1)))
+    rows, cols = M.shape
+    half = (stack.shape[-1] - 1) / 2
+    cos, sin = math.cos(angles[best]), math.sin(angles[best])
+    squares = []
+    for (brx, bry), s in largest_interior_squares(stack[best], k, gap, maxside):
+        ## Center of the square's grid points, mapped back into M
+        dx, dy = brx - (s - 1) / 2 - half, bry - (s - 1) / 2 - half
+        center = ((rows - 1) / 2 + sin * dx + cos * dy, (cols - 1) / 2 + cos * dx - sin * dy)
+        ## Squares repeat every 90 degrees, so report the smallest equivalent rotation
+        angle = (-angles[best] + math.pi / 4) % (math.pi / 2) - math.pi / 4
+        squares.append((angle, center, s))
+
+    return squares
+
+def largest_interior_square(M, maxside=None):
+    """
+    Finds the largest square of 1s in an array of 1s and 0s
+
+    Input:
+        M (2D numpy array)
+        maxside (int largest side to give the square, or None)
+    Return:
+        [(coordinates of bottom right of square), side length]
+    """
+    squares = largest_interior_squares(M, 1, maxside=maxside)
+
+    return squares[0] if squares else [(0, 0), 0]
+
+####### SURFACE SAMPLING #######
+
+class SpatialHash:
+    """
+    Uniform grid of cubic cells for finding points close to a query point.
+
+    The cell size is the largest distance that will be queried, so a query only has to look at
+    the 27 cells around the query point.
+    """
+
+    def __init__(self, cell):
+        self.cell = cell
+        self.cells = dict()
+
+    def key(self, point):
+        return (math.floor(point[0] / self.cell), math.floor(point[1] / self.cell), math.floor(point[2] / self.cell))
+
+    def add(self, point):
+        self.cells.setdefault(self.key(point), []).append(point)
+
+    def any_within(self, point, radius):
+        """
+        Checks if any stored point is closer than radius (at most the cell size) to a point.
+
+        Input:
+            point (sequence of 3 floats)
+            radius (float)
+        Return:
+            bool
+        """
+        x, y, z = self.key(point)
+        px, py, pz = point
+        radius_sq = radius * radius
+        for i in (x - 1, x, x + 1):
+            for j in (y - 1, y, y + 1):
+                for k in (z - 1, z, z + 1):
+                    for qx, qy, qz in self.cells.get((i, j, k), ()):
+                        if (qx - px)**2 + (qy - py)**2 + (qz - pz)**2 < radius_sq:
+                            return True
+
+        return False
+
+def boundary_segments(mesh, face_patch):
+    """
+    Finds the edges on the border of each patch.
+
+    Input:
+        mesh (MeshArrays, its MeshIndex supplies the edges)
+        face_patch (Numpy array, the patch of each face or -1 for faces in no patch)
+    Return:
+        segments (Numpy array of shape (edges, 2, 3), the end points of each border edge)
+    """
+    index = mesh_index(mesh)
+    patch = face_patch[mesh.loop_face]
+    inpatch = patch >= 0
+    ## An edge is on a patch border if only one of its faces belongs to that patch
+    key = index.edge_index[inpatch].astype(np.int64) * (face_patch.max() + 1) + patch[inpatch]
+    key, counts = np.unique(key, return_counts=True)
+    border = key[counts == 1] // (face_patch.max() + 1)
+
+    return mesh.co[index.edge_verts[border]]
+
+def sample_triangles(tris, count, rng):
+    """
+    Scatters points uniformly over a set of triangles, so bigger triangles get more points.
+
+    Input:
+        tris (Numpy array of shape (triangles, 3, 3))
+        count (int number of points)
+        rng (Numpy random Generator)
+    Return:
+        points (Numpy array of shape (count, 3))
+        which (Numpy array, the triangle each point lies in)
+    """
+    areas = np.linalg.norm(np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0]), axis=1)
+    which = rng.choice(len(tris), count, p=areas / areas.sum())
+    ## Uniform barycentric coordinates
+    r1 = np.sqrt(rng.random(count))[:, None]
+    r2 = rng.random(count)[:, None]
+    a, b, c = tris[which, 0], tris[which, 1], tris[which, 2]
+    points = (1 - r1) * a + r1 * (1 - r2) * b + r1 * r2 * c
+
+    return points, which
+
+def sample_segments(segments, step):
+    """
+    Places points along line segments, no further than step apart.
+
+    Input:
+        segments (Numpy array of shape (segments, 2, 3))
+        step (float)
+    Return:
+        points (Numpy array of shape (points, 3), including both ends of every segment)
+    """
+    lengths = np.linalg.norm(segments[:, 1] - segments[:, 0], axis=1)
+    pieces = np.maximum(np.ceil(lengths / step).astype(int), 1)
+    owner = np.repeat(np.arange(len(segments)), pieces + 1)
+    ## Position of each point along its segment, from 0 to 1
+    first = np.cumsum(pieces + 1) - (pieces + 1)
+    t = (np.arange(len(owner)) - first[owner]) / pieces[owner]
+    start = segments[owner, 0]
+
+    return start + t[:, None] * (segments[owner, 1] - start)
+
+def clear_of(points, blocked, clearance):
+    """
+    Checks which points are at least clearance away from every blocked point.
+
+    Input:
+        points (Numpy array of shape (points, 3))
+        blocked (Numpy array of shape (blocked points, 3))
+        clearance (float)
+    Return:
+        clear (Numpy bool array, one per point)
+    """
+    clear = np.ones(len(points), bool)
+    if not len(blocked) or clearance <= 0:
+        return clear
+    obstacles = SpatialHash(clearance)
+    for point in blocked.tolist():
+        obstacles.add(point)
+    for ind, point in enumerate(points.tolist()):
+        clear[ind] = not obstacles.any_within(point, clearance)
+
+    return clear
+
+def poisson_disk_samples(candidates, radius):
+    """
+    Picks candidate points in order, skipping any closer than radius to an already picked point.
+
+    Input:
+        candidates (Numpy array of shape (points, 3), in random order)
+        radius (float, the smallest distance between picked points)
+    Return:
+        picked (list of indices into candidates)
+    """
+    accepted = SpatialHash(radius)
+    picked = []
+    for ind, point in enumerate(candidates.tolist()):
+        if accepted.any_within(point, radius):
+            continue
+        accepted.add(point)
+        picked.append(ind)
+
+    return picked
+
+def farthest_point_samples(candidates, k, min_distance=0):
+    """
+    Picks k candidate points that are spread as far apart as possible, each new point being the
+    candidate furthest from all the points picked before it.
+
+    Input:
+        candidates (Numpy array of shape (points, 3))
+        k (int number of points to pick)
+        min_distance (float, stop early once no candidate is at least this far from the picked points)
+    Return:
+        picked (list of indices into candidates)
+    """
+    if not len(candidates) or k < 1:
+        return []
+    ## Start from the candidate furthest from the middle, so the first pick is on the outside
+    picked = [int(np.argmax(np.einsum("ij,ij->i", candidates - candidates.mean(0), candidates - candidates.mean(0))))]
+    ## Squared distance from every candidate to its closest picked point
+    nearest = np.einsum("ij,ij->i", candidates - candidates[picked[0]], candidates - candidates[picked[0]])
+    while len(picked) < k:
+        ind = int(np.argmax(nearest))
+        if nearest[ind] < min_distance**2 or nearest[ind] == 0:
+            break
+        picked.append(ind)
+        offset = candidates - candidates[ind]
+        np.minimum(nearest, np.einsum("ij,ij->i", offset, offset), out=nearest)
+
+    return picked
+
+def surface_marker_sites(mesh, patches, sidelength, spacing, samples_per_area=10, max_candidates=200000):
+    """
+    Scatters candidate marker centers over the flat patches of a mesh, keeping only the ones
+    where a whole marker fits inside its patch.
+
+    Input:
+        mesh (MeshArrays, in world space)
+        patches (list of (area, face indices) like PatchHierarchy.patches returns)
+        sidelength (float, side length of the markers)
+        spacing (float, candidates are scattered about samples_per_area per square of this side)
+        samples_per_area (float)
+        max_candidates (int, most candidate points to scatter)
+    Return:
+        sites (Numpy array of shape (sites, 3), world space, in random order)
+        normals (Numpy array of shape (sites, 3), world space surface normal at each site)
+    """
+    ## Markers may end up at any rotation, so clear them by their circumscribed circle
+    halfdiag = sidelength / math.sqrt(2)
+    face_patch = np.full(len(mesh.loop_total), -1)
+    for ind, (size, group) in enumerate(patches):
+        face_patch[group] = ind
+    tris = mesh.triangles()[face_patch[mesh.tri_face] >= 0]
+    if not len(tris):
+        return np.empty((0, 3)), np.empty((0, 3))
+    normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    area = lengths.sum() / 2
+    count = int(min(max(samples_per_area * area / spacing**2, 1), max_candidates))
+    rng = np.random.default_rng(0)
+    sites, which = sample_triangles(tris, count, rng)
+    ## Points along the patch borders, close enough that none of the border slips between them
+    step = halfdiag / 4
+    blocked = sample_segments(boundary_segments(mesh, face_patch), step)
+    clear = clear_of(sites, blocked, halfdiag + step / 2)
+    which = which[clear]
+
+    return sites[clear], normals[which] / lengths[which, None]
+
+def surface_marker_points(mesh, patches, sidelength, distance):
+    """
+    Spreads marker centers evenly over the flat patches of a mesh, ignoring patch boundaries
+    between neighbouring markers but keeping every marker inside its patch.
+
+    Input:
+        mesh (MeshArrays, in world space)
+        patches (list of (area, face indices) like PatchHierarchy.patches returns)
+        sidelength (float, side length of the markers)
+        distance (float, the smallest gap between markers)
+    Return:
+        centers (Numpy array of shape (markers, 3), world space)
+        normals (Numpy array of shape (markers, 3), world space surface normal at each center)
+    """
+    ## Space the markers by their circumscribed circles so they can't overlap at any rotation
+    radius = sidelength * math.sqrt(2) + distance
+    sites, normals = surface_marker_sites(mesh, patches, sidelength, radius)
+    picked = poisson_disk_samples(sites, radius)
+
+    return sites[picked], normals[picked]
+
+def spread_marker_points(mesh, patches, sidelength, k):
+    """
+    Picks k marker centers on the flat patches of a mesh, as far apart from each other as
+    possible.
+
+    Input:
+        mesh (MeshArrays, in world space)
+        patches (list of (area, face indices) like PatchHierarchy.patches returns)
+        sidelength (float, side length of the markers)
+        k (int number of markers)
+    Return:
+        centers (Numpy array of shape (markers, 3), world space, fewer than k if no more markers fit)
+        normals (Numpy array of shape (markers, 3), world space surface normal at each center)
+    """
+    sites, normals = surface_marker_sites(mesh, patches, sidelength, sidelength, max_candidates=50000)
+    picked = farthest_point_samples(sites, k, sidelength * math.sqrt(2))
+
+    return sites[picked], normals[picked]
+
+####### ARUCO CODES #######
+
+## Inner bits of every ArUco in each bundled dictionary, keyed by marker size and read on first use
+aruco_codewords = dict()
+
+def aruco_file(filename):
+    """
+    Finds a file in the Arucos folder, looking in the working directory (where Blender is run from),
+    then inside the add-on's folder and then next to it.
+
+    Input:
+        filename (str name of the file inside Arucos)
+    Return:
+        path (str)
+    """
+    package = os.path.dirname(os.path.abspath(__file__))
+    for folder in (os.getcwd(), package, os.path.dirname(package)):
+        path = os.path.join(folder, "Arucos", filename)
+        if os.path.exists(path):
+            break
+
+    return path
+
+def dictionary_size(arucodict):
+    """
+    Reads the marker size and number of IDs from an ArUco dictionary name.
+
+    Input:
+        arucodict (str dictionary name like "4X4_50")
+    Return:
+        (size, count) (ints, size x size inner bits and count IDs)
+    """
+    size, count = arucodict.split("_")
+
+    return int(size.split("X")[0]), int(count)
+
+def aruco_cells(arucodict, arucoid):
+    """
+    Looks up the black cells of an ArUco, including its black border.
+
+    Input:
+        arucodict (str dictionary name like "4X4_50", Arucos/DICT_<size>X<size>_1000.txt must exist)
+        arucoid (int ID within the dictionary)
+    Return:
+        cells (2D Numpy bool array, True for black cells, row 0 at the top of the code)
+    """
+    size, count = dictionary_size(arucodict)
+    if not 0 <= arucoid < count:
+        raise ValueError(f"ArUco ID {arucoid} is not in the {arucodict} dictionary (IDs 0 to {count - 1})")
+    if size not in aruco_codewords:
+        with open(aruco_file(f"DICT_{size}X{size}_1000.txt")) as dictfile:
+            aruco_codewords[size] = [int(line, 16) for line in dictfile.read().splitlines() if line and not line.startswith("#")]
+    bits = (aruco_codewords[size][arucoid] >> np.arange(size * size)[::-1]) & 1
+    cells = np.ones((size + 2, size + 2), bool)
+    ## In the dictionary 1 is a white cell
+    cells[1:-1, 1:-1] = bits.reshape(size, size) == 0
+
+    return cells
+
+def greedy_rectangles(cells):
+    """
+    Covers the True cells of a grid with as few rectangles as a greedy scan finds: each run is
+    grown right as far as it goes, then down as long as the whole run below is free.
+
+    Input:
+        cells (2D Numpy bool array)
+    Return:
+        rects (list of (row, col, rows, cols) with the top left cell and size of each rectangle)
+    """
+    free = cells.copy()
+    rows, cols = free.shape
+    rects = []
+    for row, col in zip(*np.nonzero(cells)):
+        if not free[row, col]:
+            continue
+        width = 1
+        while col + width < cols and free[row, col + width]:
+            width += 1
+        height = 1
+        while row + height < rows and free[row + height, col:col + width].all():
+            height += 1
+        free[row:row + height, col:col + width] = False
+        rects.append((row, col, height, width))
+
+    return rects
+
+def split_at_junctions(rects):
+    """
+    Cuts rectangles wherever the corner of another rectangle lies inside one of their sides, until
+    there are none left, so that a mesh of the rectangles has no T-junctions.
+
+    Input:
+        rects (list of (row, col, rows, cols) like greedy_rectangles returns)
+    Return:
+        rects (list of (row, col, rows, cols) covering the same cells)
+    """
+    rects = list(rects)
+    while True:
+        corners = {corner for r, c, h, w in rects for corner in ((r, c), (r + h, c), (r, c + w), (r + h, c + w))}
+        split = []
+        for r, c, h, w in rects:
+            ## Corners on the left or right side cut across the rectangle, corners on the top or bottom cut down it
+            cutrows = sorted({cr for cr, cc in corners if r < cr < r + h and cc in (c, c + w)})
+            cutcols = sorted({cc for cr, cc in corners if c < cc < c + w and cr in (r, r + h)})
+            edgerows = [r] + cutrows + [r + h]
+            edgecols = [c] + cutcols + [c + w]
+            split += [(r0, c0, r1 - r0, c1 - c0) for r0, r1 in zip(edgerows, edgerows[1:]) for c0, c1 in zip(edgecols, edgecols[1:])]
+        if len(split) == len(rects):
+            return split
+        rects = split
+
+def rectangles_to_mesh(rects, shape):
+    """
+    Builds a mesh with one quad per grid rectangle, welded at shared corners and centered on the origin.
+
+    Input:
+        rects (list of (row, col, rows, cols) like greedy_rectangles returns)
+        shape ((rows, cols) of the grid)
+    Return:
+        verts (list of (x, y, z) vertex coordinates)
+        faces (list of vertex index quads)
+    """
+    rows, cols = shape
+    row, col, height, width = np.array(rects, int).reshape(-1, 4).T
+    ## Corners of every rectangle on the (rows + 1) x (cols + 1) lattice, counter-clockwise seen from above
+    corners = np.stack([
+        (row + height) * (cols + 1) + col,
+        (row + height) * (cols + 1) + col + width,
+        row * (cols + 1) + col + width,
+        row * (cols + 1) + col,
+    ], axis=1)
+    ## Keep only the lattice points that are used, so shared corners become one vertex
+    used, faces = np.unique(corners, return_inverse=True)
+    lattice_row, lattice_col = np.divmod(used, cols + 1)
+    ## Flip the rows so the top of the code points along +Y
+    verts = np.stack([lattice_col - cols / 2, rows / 2 - lattice_row, np.zeros(len(used))], axis=1)
+
+    return verts.tolist(), faces.reshape(-1, 4).tolist()
+
+def aruco_geometry(arucodict, arucoid):
+    """
+    Builds the faces of an ArUco.
+
+    Input:
+        arucodict (str dictionary name like "4X4_50")
+        arucoid (int ID within the dictionary)
+    Return:
+        verts (list of (x, y, 0), 1 unit per cell and centered on the origin)
+        faces (list of vertex index tuples)
+    """
+    cells = aruco_cells(arucodict, arucoid)
+
+    return rectangles_to_mesh(split_at_junctions(greedy_rectangles(cells)), cells.shape)
+
+####### PLACEMENT PLAN #######
+
+def normal_frame(center, normal):
+    """
+    Builds a frame at a point on a surface, with Z along the surface normal and Y turned as close
+    to world Z as it can be (world Y on surfaces facing straight up or down).
+
+    Input:
+        center (array-like of length 3)
+        normal (array-like of length 3)
+    Return:
+        frame (Numpy array of shape (4, 4), taking the frame to world coordinates)
+    """
+    zaxis = np.asarray(normal, float) / np.linalg.norm(normal)
+    up = np.array([0.0, 0.0, 1.0]) if abs(zaxis[2]) < 0.999 else np.array([0.0, 1.0, 0.0])
+    yaxis = up - (up @ zaxis) * zaxis
+    yaxis /= np.linalg.norm(yaxis)
+    frame = np.eye(4)
+    frame[:3, :3] = np.stack([np.cross(yaxis, zaxis), yaxis, zaxis], axis=1)
+    frame[:3, 3] = center
+
+    return frame
+
+def rotation_z(angle):
+    """
+    Builds a 4x4 rotation about the Z axis.
+
+    Input:
+        angle (float radians)
+    Return:
+        (Numpy array of shape (4, 4))
+    """
+    rotation = np.eye(4)
+    rotation[:2, :2] = [[math.cos(angle), -math.sin(angle)], [math.sin(angle), math.cos(angle)]]
+
+    return rotation
+
+def align_frame(frame, code_co, scale, plane_norm, alignangle):
+    """
+    Turns a placed code about its own Z axis so that its bottom edge lines up with a plane.
+
+    Input:
+        frame (Numpy array of shape (4, 4), where the code is placed before it is scaled)
+        code_co (Numpy array of shape (vertices, 3), vertices of the code)
+        scale ((x, y) scale the code is given to reach the marker size)
+        plane_norm (tuple, normal of the plane to align to)
+        alignangle (float, extra rotation in degrees)
+    Return:
+        frame (Numpy array of shape (4, 4) of the turned code)
+    """
+    btmleft = code_co[np.argmax(-code_co[:, 0] - code_co[:, 1])]
+    btmright = code_co[np.argmax(code_co[:, 0] - code_co[:, 1])]
+    vec_1 = frame[:3, :3] @ ((btmleft - btmright)[:3] * (scale[0], scale[1], 1))
+    vec_1_norm = vec_1 / np.linalg.norm(vec_1)
+    ## Turn that undoes the edge's tilt towards the plane normal
+    a = vec_1_norm @ plane_norm
+    tilt = math.asin(np.clip(a, -1, 1))
+    reference = -math.copysign(math.pi - abs(tilt), tilt)
+    ## Undoing the tilt only levels the edge on planes square to the code, so use the turn that
+    ## levels it exactly that is closest to it. Turning by t leaves the edge at a cos(t) + b sin(t)
+    ## along the plane normal, which is 0 at two turns half a revolution apart
+    b = np.cross(frame[:3, 2], vec_1_norm) @ plane_norm
+    level = math.atan2(-a, b)
+    if abs((level - reference + math.pi) % (2 * math.pi) - math.pi) > math.pi / 2:
+        level += math.pi
+
+    ## Level the edge, then turn back by the user's align angle, before the code is scaled
+    return frame @ rotation_z(level - math.radians(alignangle))
+
+@dataclass
+class MarkerPlacement:
+    """
+    Where one marker goes on the model.
+
+    frame takes the marker's own coordinates to world coordinates: the code lies in its XY plane,
+    centered on the origin and facing +Z, and is scaled to sidelength before frame is applied.
+    arucoid is None for custom codes.
+    """
+    frame: np.ndarray
+    sidelength: float
+    arucoid: Optional[int] = None
+
+    @property
+    def center(self):
+        return self.frame[:3, 3]
+
+## BEI operator settings plan_placements reads, with the operator's defaults
+default_options = {
+    "usinggeometric": False,
+    "uniformparam": "op1",
+    "fixednum": False,
+    "intermarker": False,
+    "spreadcodes": False,
+    "codes": 1,
+    "uniformdist": 1,
+    "sidelength": 100,
+    "sharpness": 0.1,
+    "maxfaces": 1250,
+    "accuracy": 1,
+    "searchrotation": True,
+    "fixedaruco": False,
+    "sequential": False,
+    "arucodict": "4X4_50",
+    "fixedarucoid": 0,
+    "startingat": 0,
+    "aligncode": False,
+    "plane": "opxy",
+    "alignangle": 0,
+}
+
+## Normal of each plane the markers can be aligned to
+plane_normals = {"opxy": (0, 0, 1), "opyz": (1, 0, 0), "opxz": (0, 1, 0)}
+
+def patch_placements(mesh, group, markers, options):
+    """
+    Lays a patch flat and finds where its markers go.
+
+    Input:
+        mesh (MeshArrays)
+        group (Numpy array of the face indices of the patch)
+        markers (int number of markers wanted, when searching for the largest squares)
+        options (dict of BEI settings like default_options)
+    Return:
+        frames (list of Numpy arrays of shape (4, 4), the world frame of each marker)
+    """
+    sidelength = options["sidelength"]
+
+    ####### LAY THE PATCH FLAT ON THE XY PLANE AT THE ORIGIN #######
+
+    ## The frame takes the flattened patch back to its place on the model
+    flat, patch_matrix = flatten_patch(mesh.triangles()[np.isin(mesh.tri_face, group)])
+
+    ####### CONVERT PATCH TO ARRAY OF 1s AND 0s #######
+
+    ## Get the x and y bounds of the patch
+    min_x, min_y = flat[:, :, :2].min(axis=(0, 1))
+    max_x, max_y = flat[:, :, :2].max(axis=(0, 1))
+    ## Choose the detail (dimensions) of the array in the x direction
+    dimx = int(300 * options["accuracy"]) + 1
+    ## Calculate dimension in the y direction to ensure the interval is consistent
+    dimy = int(dimx * ((max_y - min_y) / (max_x - min_x))) + 1
+    ## Calculate the interval
+    interval = (max_x - min_x) / dimx
+    ## Starting location for ray casts
+    startloc = (min_x, max_y, 1)
+
+    patchtree = OccupancyQuadtree(flat, dimx, dimy, interval, startloc)
+
+    if options["usinggeometric"] and options["intermarker"]:
+
+        ####### GET UNIFORM POINTS IN THE PATCH #######
+
+        ## Pack codes of the marker size, uniformdist apart, wherever the patch leaves room
+        points = [(row, col, 0) for row, col in patchtree.pack_squares(sidelength / interval, (sidelength + options["uniformdist"]) / interval)]
+    else:
+
+        ####### GET THE LARGEST INTERIOR SQUARES IN THE PATCH #######
+
+        ## With several markers the squares are only grown to the marker size, so that the first one can't take the room of the rest
+        maxside = math.ceil(sidelength / interval) if markers > 1 else None
+        ## Each square stores its rotation, the (row, col) of its center and its side length
+        if options["searchrotation"]:
+            squares = patchtree.rotated_squares(markers, np.radians(np.arange(0, 90, 5)), maxside=maxside)
+        else:
+            squares = [(0, (bry - s / 2, brx - s / 2), s) for (brx, bry), s in patchtree.largest_squares(markers, maxside=maxside)]
+        ## Squares after the first must fit a whole marker so that markers can't overlap
+        squares = squares[:1] + [sq for sq in squares[1:] if sq[2] * interval >= sidelength]
+        ## Marker centers and rotations as (row, col, angle), like the uniform points
+        points = [(row, col, angle) for angle, (row, col), s in squares]
+
+    frames = []
+    for row, col, angle in points:
+        ## Place and rotate the code in the flattened patch, then move it to the patch's original location on the model
+        offset = np.eye(4)
+        offset[:3, 3] = indices_to_coords(startloc, interval, row, col)
+        frames.append(patch_matrix @ offset @ rotation_z(angle))
+
+    return frames
+
+def plan_placements(mesh, options, selected=(), code_co=None):
+    """
+    Decides where every marker goes and which ArUco it shows, following the BEI settings.
+
+    Input:
+        mesh (MeshArrays of the model, in world space)
+        options (dict of BEI settings, missing ones take their values from default_options)
+        selected (face indices the user selected, for the selected region and manual modes)
+        code_co (Numpy array of shape (vertices, 3), vertices of a custom code, needed to align custom codes)
+    Return:
+        plan (list of MarkerPlacement)
+        warnings (list of str, settings that had to be adjusted)
+    """
+    options = dict(default_options, **options)
+    sidelength = options["sidelength"]
+    sharpness = options["sharpness"]
+    ignorebottom = options["uniformparam"] == "op3"
+    selected = np.asarray(selected, np.int64)
+    warnings = []
+    ## World frame of every marker, before it is scaled to the marker size
+    frames = []
+
+    Whole_Object = options["uniformparam"] == 'op1' or options["uniformparam"] == 'op3'
+    if options["usinggeometric"] and Whole_Object and (options["intermarker"] or options["fixednum"] and options["spreadcodes"]):
+        ## Spread the codes over the whole surface at once, so no patches need to be flattened
+        hierarchy = get_patch_hierarchy(mesh, options["maxfaces"])
+        bigpatches = [(size, group) for size, group in hierarchy.patches(sharpness, ignorebottom) if size >= 1.5 * sidelength**2]
+        if options["intermarker"]:
+            centers, normals = surface_marker_points(mesh, bigpatches, sidelength, options["uniformdist"])
+        else:
+            centers, normals = spread_marker_points(mesh, bigpatches, sidelength, options["codes"])
+        ## Face the codes along the surface normal
+        frames = [normal_frame(center, normal) for center, normal in zip(centers, normals)]
+    else:
+        if options["usinggeometric"] and Whole_Object:
+            ## Find the patches on a light proxy of the model, they are still flattened from the model's own faces
+            hierarchy = get_patch_hierarchy(mesh, options["maxfaces"])
+            out = hierarchy.patches(sharpness, ignorebottom)
+            number_of_patches = min(options["codes"], len(out))
+            ## Spread the codes over the patches, largest patches first
+            markers_per_patch = [options["codes"] // number_of_patches + (ind < options["codes"] % number_of_patches) for ind in range(number_of_patches)]
+            patches = [group for size, group in out[:number_of_patches]]
+        elif options["usinggeometric"]: ## Uniform selected region
+            ## The selected faces make up the patch
+            patches = [selected]
+            markers_per_patch = [options["codes"]]
+        else: ## Manual, a patch of flat faces within a marker's length of every selected face
+            index = mesh_index(mesh)
+            patches = [np.array(grow_patch(index, seed, sharpness, 1, sidelength)) for seed in selected.tolist()]
+            markers_per_patch = [1] * len(patches)
+        for group, markers in zip(patches, markers_per_patch):
+            ## Nothing selected leaves an empty region, which the warning below reports
+            if len(group):
+                frames += patch_placements(mesh, group, markers, options)
+
+    ## A fixed number of codes may not all fit
+    if options["usinggeometric"] and not options["intermarker"] and len(frames) < options["codes"]:
+        warnings.append(f"Only {len(frames)} of {options['codes']} markers fit at side length {sidelength}")
+
+    ####### CONFIGURE THE CODES #######
+
+    ## Don't run past the end of the ArUco dictionary
+    idcount = dictionary_size(options["arucodict"])[1]
+    fixedarucoid = options["fixedarucoid"]
+    if options["fixedaruco"] and fixedarucoid >= idcount:
+        warnings.append(f"ID {fixedarucoid} is not in the {options['arucodict']} dictionary, using ID 0")
+        fixedarucoid = 0
+    if options["sequential"] and options["startingat"] + len(frames) > idcount:
+        warnings.append(f"The {options['arucodict']} dictionary only has IDs up to {idcount - 1}, embedding {max(idcount - options['startingat'], 0)} of {len(frames)} markers")
+        frames = frames[:max(idcount - options["startingat"], 0)]
+
+    plan = []
+    for num, frame in enumerate(frames):
+        if options["sequential"]: ## A new ArUco for every marker
+            arucoid = num + options["startingat"]
+        elif options["fixedaruco"]:
+            arucoid = fixedarucoid
+        else:
+            arucoid = None
+        if options["aligncode"]:
+            co = code_co if arucoid is None else np.array(aruco_geometry(options["arucodict"], arucoid)[0], float)
+            width, height = np.ptp(co[:, 0]), np.ptp(co[:, 1])
+            frame = align_frame(frame, co, (sidelength / width, sidelength / height), plane_normals[options["plane"]], options["alignangle"])
+        plan.append(MarkerPlacement(frame, sidelength, arucoid))
+
+    return plan, warnings
+
+####### SOLIDS AND EXPORT #######
+
+def polygon_loops(loop_total):
+    """
+    Finds the first loop of every polygon and the next loop around the polygon for every loop.
+
+    Input:
+        loop_total (Numpy array, number of loops of each polygon)
+    Return:
+        loop_start (Numpy array, first loop of each polygon)
+        loop_next (Numpy array, the loop after each loop, wrapping back to the polygon's first loop)
+    """
+    loop_start = np.cumsum(loop_total) - loop_total
+    loop_next = np.arange(loop_total.sum()) + 1
+    loop_next[loop_start + loop_total - 1] = loop_start
+
+    return loop_start, loop_next
+
+def reverse_polygons(loop_verts, loop_total):
+    """
+    Flips polygons by reversing the order of their loops.
+
+    Input:
+        loop_verts (Numpy array, vertex index of each loop)
+        loop_total (Numpy array, number of loops of each polygon)
+    Return:
+        loop_verts (Numpy array, vertex index of each loop of the flipped polygons)
+    """
+    loop_start = np.cumsum(loop_total) - loop_total
+    owner = np.repeat(np.arange(len(loop_total)), loop_total)
+    ## Loop k of a polygon becomes loop (total - 1 - k)
+    offset = np.arange(len(loop_verts)) - loop_start[owner]
+
+    return loop_verts[loop_start[owner] + loop_total[owner] - 1 - offset]
+
+def vertex_normals(verts, loop_verts, loop_total):
+    """
+    Calculates area weighted vertex normals of a polygon mesh.
+
+    Input:
+        verts (Numpy array of shape (vertices, 3))
+        loop_verts (Numpy array, vertex index of each loop)
+        loop_total (Numpy array, number of loops of each polygon)
+    Return:
+        normals (Numpy array of shape (vertices, 3), unit length)
+    """
+    loop_start, loop_next = polygon_loops(loop_total)
+    ## Newell's method, each polygon's sum has the direction of its normal and twice its area as length
+    owner = np.repeat(np.arange(len(loop_total)), loop_total)
+    face_normals = np.zeros((len(loop_total), 3))
+    np.add.at(face_normals, owner, np.cross(verts[loop_verts], verts[loop_verts[loop_next]]))
+    normals = np.zeros_like(verts)
+    np.add.at(normals, loop_verts, face_normals[owner])
+    lengths = np.linalg.norm(normals, axis=1)
+
+    return normals / np.where(lengths > 0, lengths, 1)[:, None]
+
+def solidify(verts, loop_verts, loop_total, shellthickness, thick):
+    """
+    Turns the projected codes into closed solids: each vertex is pushed shellthickness under the
+    surface along its own normal, and a copy thick further in closes the solid with side walls
+    along the codes' borders.
+
+    Input:
+        verts (Numpy array of shape (vertices, 3), the codes lying on the surface)
+        loop_verts (Numpy array, vertex index of each loop)
+        loop_total (Numpy array, number of loops of each polygon)
+        shellthickness (float)
+        thick (float)
+    Return:
+        (verts, loop_verts, loop_total) of the solids, with every polygon facing outwards
+    """
+    count = len(verts)
+    normals = vertex_normals(verts, loop_verts, loop_total)
+    top = verts - normals * shellthickness
+    bottom = verts - normals * (shellthickness + thick)
+    ## Edges used by only one polygon are on a code's border
+    loop_start, loop_next = polygon_loops(loop_total)
+    edge_a = loop_verts.astype(np.int64)
+    edge_b = loop_verts[loop_next].astype(np.int64)
+    border = ~np.isin(edge_a * count + edge_b, edge_b * count + edge_a)
+    edge_a, edge_b = edge_a[border], edge_b[border]
+    ## Wall quads run from the top edge down to the matching bottom edge
+    walls = np.stack([edge_b, edge_a, edge_a + count, edge_b + count], axis=1)
+
+    solid_loops = np.concatenate([loop_verts, reverse_polygons(loop_verts, loop_total) + count, walls.ravel()])
+    solid_totals = np.concatenate([loop_total, loop_total, np.full(len(walls), 4)])
+
+    return np.concatenate([top, bottom]), solid_loops, solid_totals
+
+def join_buffers(buffers):
+    """
+    Joins several (co, tri_verts) buffers into one.
+
+    Input:
+        buffers (list of (co, tri_verts) like mesh_buffers returns)
+    Return:
+        (co, tri_verts)
+    """
+    offsets = np.cumsum([0] + [len(co) for co, tri_verts in buffers])
+
+    return (np.concatenate([co for co, tri_verts in buffers] + [np.empty((0, 3))]),
+            np.concatenate([tri_verts + offset for (co, tri_verts), offset in zip(buffers, offsets)] + [np.empty((0, 3), int)]))
+
+def write_stl(filepath, co, tri_verts):
+    """
+    Writes triangles to a binary .stl file.
+
+    Input:
+        filepath (str)
+        co (Numpy array of shape (vertices, 3))
+        tri_verts (Numpy array of shape (triangles, 3))
+    Return:
+        None
+    """
+    tris = co[tri_verts]
+    normals = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    records = np.zeros(len(tris), np.dtype([("normal", "<f4", 3), ("tri", "<f4", (3, 3)), ("attr", "<u2")]))
+    records["normal"] = normals / np.where(lengths > 0, lengths, 1)[:, None]
+    records["tri"] = tris
+    with open(filepath, "wb") as stlfile:
+        stlfile.write(b"Binary STL written by the BrightMarker Embedding Interface".ljust(80, b" "))
+        stlfile.write(np.uint32(len(tris)).tobytes())
+        records.tofile(stlfile)
+
+def write_3mf(filepath, bodies):
+    """
+    Writes several bodies to a .3mf file, each with its own material. Bodies without triangles are
+    left out, as a 3MF object must have some.
+
+    Input:
+        filepath (str)
+        bodies (list of (name, display color like "#FFFFFF", co, tri_verts))
+    Return:
+        None
+    """
+    bodies = [body for body in bodies if len(body[3])]
+    model = io.StringIO()
+    model.write('<?xml version="1.0" encoding="UTF-8"?>\n<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n<resources>\n<basematerials id="1">\n')
+    for name, color, co, tri_verts in bodies:
+        model.write(f'<base name="{name}" displaycolor="{color}"/>\n')
+    model.write('</basematerials>\n')
+    for ind, (name, color, co, tri_verts) in enumerate(bodies):
+        model.write(f'<object id="{ind + 2}" type="model" name="{name}" pid="1" pindex="{ind}">\n<mesh>\n<vertices>\n')
+        np.savetxt(model, co, fmt='<vertex x="%.6f" y="%.6f" z="%.6f"/>')
+        model.write('</vertices>\n<triangles>\n')
+        np.savetxt(model, tri_verts, fmt='<triangle v1="%d" v2="%d" v3="%d"/>')
+        model.write('</triangles>\n</mesh>\n</object>\n')
+    model.write('</resources>\n<build>\n')
+    for ind in range(len(bodies)):
+        model.write(f'<item objectid="{ind + 2}"/>\n')
+    model.write('</build>\n</model>\n')
+
+    with zipfile.ZipFile(filepath, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", '<?xml version="1.0" encoding="UTF-8"?>\n<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\n<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\n<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>\n</Types>\n')
+        package.writestr("_rels/.rels", '<?xml version="1.0" encoding="UTF-8"?>\n<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\n<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>\n</Relationships>\n')
+        package.writestr("3D/3dmodel.model", model.getvalue())
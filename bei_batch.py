@@ -0,0 +1,214 @@
+"""
+Runs the BrightMarker Embedding Interface on a batch of models without a UI.
+
+Usage:
+    blender -b -P bei_batch.py -- --config job.json --input models/ --output out/
+
+--input is a folder of .stl/.obj/.ply models, a single model, or a manifest: a .json list of model
+paths or a text file with one model path per line. --config is a .json object of BEI operator properties,
+named like the properties of OBJECT_OT_optimalembed in BEI/__init__.py, for example:
+    {"usinggeometric": true, "uniformparam": "op1", "intermarker": true, "uniformdist": 2,
+     "sidelength": 10, "fixedaruco": true, "fixedarucoid": 3, "customoffset": true,
+     "offset": 0.6, "thickness": 1.2}
+offset and thickness are used unless "suggestoffset" picks them for "chosencolor". Models must have
+different file names, as the outputs are named after them.
+
+Every model is embedded in a fresh scene and written to the output folder as <model>_model.stl
+(the model with its air gaps), <model>_codes.stl and <model>.3mf holding both as separate materials
+(and <model>.blend with --blend). A report of every
+model's status, timing and outputs is written to --report (out/report.json by default), and
+rewritten after every model so that it holds the finished models even if Blender crashes.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import BEI
+from bei_scheduler import find_models
+
+
+def import_operator(module, name, legacy_module, legacy_name):
+    """
+    Picks the built-in importer when this Blender has it, or the older Python add-on importer that
+    newer Blenders have removed.
+
+    Input:
+        module, name (str bpy.ops module and operator name of the built-in importer)
+        legacy_module, legacy_name (str bpy.ops module and operator name of the older importer)
+    Return:
+        operator (bpy.ops operator)
+    """
+    ## bpy.ops makes up operators for any attribute name, so only dir() tells which ones exist
+    if name in dir(getattr(bpy.ops, module)):
+        return getattr(getattr(bpy.ops, module), name)
+
+    return getattr(getattr(bpy.ops, legacy_module), legacy_name)
+
+## Import operator for each model file type
+importers = {
+    ".stl": import_operator("wm", "stl_import", "import_mesh", "stl"),
+    ".obj": import_operator("wm", "obj_import", "import_scene", "obj"),
+    ".ply": import_operator("wm", "ply_import", "import_mesh", "ply"),
+}
+
+def script_args(argv):
+    """
+    Parses the arguments given after "--" on the Blender command line.
+
+    Input:
+        argv (list of str, the full command line)
+    Return:
+        argparse Namespace
+    """
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="blender -b -P bei_batch.py --", description="Embed codes in a batch of models")
+    parser.add_argument("--input", required=True, help="folder of models, a single model, or a manifest (.json list or text file of paths)")
+    parser.add_argument("--config", required=True, help=".json object of BEI operator properties")
+    parser.add_argument("--output", required=True, help="folder to write the embedded models to")
+    parser.add_argument("--report", help="where to write the .json report (default: <output>/report.json)")
+    parser.add_argument("--blend", action="store_true", help="also save each embedded scene as a .blend")
+
+    return parser.parse_args(argv)
+
+def load_config(filepath):
+    """
+    Reads the operator properties for the batch, checking that they all exist.
+
+    Input:
+        filepath (str path of the .json config)
+    Return:
+        config (dict of property name to value)
+    """
+    with open(filepath) as configfile:
+        config = json.load(configfile)
+    known = BEI.OBJECT_OT_optimalembed.__annotations__
+    unknown = sorted(set(config) - set(known))
+    if unknown:
+        raise ValueError(f"Unknown BEI properties {unknown}, expected some of {sorted(known)}")
+
+    return config
+
+def clear_scene():
+    """
+    Removes every object, and every mesh other than the stored ArUcos, from the file.
+
+    Input:
+        None
+    Return:
+        None
+    """
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for me in list(bpy.data.meshes):
+        if not me.name.startswith("ArUco "):
+            bpy.data.meshes.remove(me)
+
+def import_model(filepath):
+    """
+    Imports a model into an empty scene as a single active, selected object.
+
+    Input:
+        filepath (str path of a .stl, .obj or .ply model)
+    Return:
+        obj (the imported Blender mesh object)
+    """
+    clear_scene()
+    importers[os.path.splitext(filepath)[1].lower()](filepath=filepath)
+    parts = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    if not parts:
+        raise ValueError(f"No mesh found in {filepath}")
+    bpy.context.view_layer.objects.active = parts[0]
+    for obj in parts:
+        obj.select_set(state = True)
+    ## Some files import as several objects
+    if len(parts) > 1:
+        bpy.ops.object.join()
+    obj = bpy.context.view_layer.objects.active
+    obj.name = os.path.splitext(os.path.basename(filepath))[0]
+
+    return obj
+
+def write_report(results, filepath):
+    """
+    Writes the results so far, replacing the whole report at once so it is never left half written.
+
+    Input:
+        results (list of result dicts)
+        filepath (str path of the .json report)
+    Return:
+        None
+    """
+    with open(filepath + ".tmp", "w") as reportfile:
+        json.dump(results, reportfile, indent=2)
+    os.replace(filepath + ".tmp", filepath)
+
+def embed_model(filepath, config, outdir, blend=False):
+    """
+    Embeds codes in one model and writes the results.
+
+    Input:
+        filepath (str path of the model)
+        config (dict of BEI operator properties)
+        outdir (str folder for the results)
+        blend (bool, True to also save the scene as a .blend)
+    Return:
+        result (dict with the model's status, timing, marker count and output files)
+    """
+    result = {"model": filepath, "status": "failed", "outputs": []}
+    start = time.perf_counter()
+    try:
+        model = import_model(filepath)
+        stem = model.name
+        ret = bpy.ops.object.optimalembed('EXEC_DEFAULT', **config)
+        if 'FINISHED' not in ret:
+            raise RuntimeError(f"BEI returned {ret}")
+        codes = [obj for obj in bpy.context.scene.objects if obj.name.startswith("Code Piece")]
+        airgaps = [obj for obj in bpy.context.scene.objects if obj.name.startswith("Air Gap")]
+        result["markers"] = sum(obj.get("markers", 1) for obj in codes)
+        result["outputs"] += BEI.export_embedded(model, codes, airgaps, outdir, stem)
+        if blend:
+            out = os.path.join(outdir, f"{stem}.blend")
+            bpy.ops.wm.save_as_mainfile(filepath=out, check_existing=False)
+            result["outputs"].append(out)
+        result["status"] = "done"
+    except Exception:
+        result["error"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+
+    return result
+
+def main(argv):
+    args = script_args(argv)
+    try:
+        config = load_config(args.config)
+        models = find_models(args.input)
+    except ValueError as err:
+        print(err)
+        sys.exit(1)
+    os.makedirs(args.output, exist_ok=True)
+    BEI.register()
+
+    report = args.report or os.path.join(args.output, "report.json")
+    results = []
+    write_report(results, report)
+    for num, filepath in enumerate(models):
+        result = embed_model(filepath, config, args.output, args.blend)
+        results.append(result)
+        print(f"[{num + 1}/{len(models)}] {result['status']} {filepath} ({result['seconds']:.1f} s)")
+        if "error" in result:
+            print(result["error"])
+        write_report(results, report)
+
+    failed = sum(result["status"] != "done" for result in results)
+    print(f"Embedded {len(results) - failed} of {len(results)} models")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main(sys.argv)
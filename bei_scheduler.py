@@ -0,0 +1,231 @@
+"""
+Spreads a batch of models over several long-lived background Blender processes running bei_batch.py.
+
+Usage:
+    python bei_scheduler.py --config job.json --input models/ --output out/ --workers 16
+
+--input and --config are the same as for bei_batch.py. The models are dealt out into --workers
+shards, and each shard is embedded by one "blender -b -P bei_batch.py" process, so Blender and the
+add-on start once per worker rather than once per model. Only the models that failed, or that a
+crashed or timed out worker never reached, are dealt out again, up to --retries more times. --timeout
+is per model: a worker is stopped after --timeout times the number of models in its shard. The
+status, attempts and timing of every model are collected in --summary (out/summary.json by default).
+
+find_models is also used by bei_batch.py, so this file must not import bpy.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+## Model file types bei_batch.py can import
+model_types = (".stl", ".obj", ".ply")
+
+def find_models(source):
+    """
+    Lists the models to embed.
+
+    Input:
+        source (str path of a folder of models, a single model or a manifest)
+    Return:
+        models (list of str absolute paths)
+
+    Raises ValueError if two models have the same file name, as their outputs would overwrite each other.
+    """
+    if os.path.splitext(source)[1].lower() in model_types:
+        models = [source]
+    elif os.path.isdir(source):
+        models = [os.path.join(source, name) for name in sorted(os.listdir(source)) if os.path.splitext(name)[1].lower() in model_types]
+    else:
+        with open(source) as manifest:
+            if source.lower().endswith(".json"):
+                models = json.load(manifest)
+            else:
+                models = [line.strip() for line in manifest if line.strip() and not line.startswith("#")]
+        ## Paths in a manifest are relative to the manifest
+        models = [os.path.join(os.path.dirname(os.path.abspath(source)), path) for path in models]
+
+    models = [os.path.abspath(path) for path in models]
+    ## Outputs are named after the model's file name, so it has to be unique, whatever the case
+    names = dict()
+    for path in models:
+        names.setdefault(os.path.splitext(os.path.basename(path))[0].lower(), []).append(path)
+    clashes = [paths for paths in names.values() if len(paths) > 1]
+    if clashes:
+        raise ValueError("Models with the same file name would overwrite each other's outputs: " + "; ".join(", ".join(paths) for paths in clashes))
+
+    return models
+
+def make_shards(models, workers):
+    """
+    Deals the models out to the workers like cards, so every worker gets a similar mix of the folder.
+
+    Input:
+        models (list of str paths)
+        workers (int most workers to use)
+    Return:
+        shards (list of non-empty lists of str paths)
+    """
+    count = max(min(workers, len(models)), 1)
+
+    return [shard for shard in (models[num::count] for num in range(count)) if shard]
+
+def read_report(report):
+    """
+    Reads the results a worker wrote, which may be cut short if the worker crashed.
+
+    Input:
+        report (str path of the worker's .json report)
+    Return:
+        results (dict of bei_batch.py result by model path, empty if there is no readable report)
+    """
+    try:
+        with open(report) as reportfile:
+            return {result["model"]: result for result in json.load(reportfile)}
+    except (OSError, ValueError):
+        return dict()
+
+def settle_shard(shard, results):
+    """
+    Sorts a worker's models by what happened to them. bei_batch.py embeds its models in order and
+    writes its report after every model, so the first model without a result is the one the worker
+    was on when it died, and the models after it were never tried.
+
+    Input:
+        shard (list of str paths the worker was given, in order)
+        results (dict of bei_batch.py result by model path)
+    Return:
+        tried (list of str paths of the models that were tried)
+        untried (list of str paths of the models the worker never reached)
+    """
+    reached = len(shard)
+    for num, model in enumerate(shard):
+        if model not in results:
+            reached = num + 1
+            break
+
+    return shard[:reached], shard[reached:]
+
+def run_worker(shard, args, worknum):
+    """
+    Embeds a shard of models in one background Blender process.
+
+    Input:
+        shard (list of str paths of the models)
+        args (argparse Namespace of the scheduler)
+        worknum (str, used to name the worker's manifest, report and log)
+    Return:
+        results (dict of bei_batch.py result by model path, for the models the worker finished)
+        error (str why the worker stopped early, or None)
+        log (str path of the worker's log)
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bei_batch.py")
+    manifest = os.path.join(args.output, "jobs", f"{worknum}-models.json")
+    report = os.path.join(args.output, "jobs", f"{worknum}.json")
+    log = os.path.join(args.output, "jobs", f"{worknum}.log")
+    with open(manifest, "w") as manifestfile:
+        json.dump(shard, manifestfile, indent=2)
+    if os.path.exists(report):
+        os.remove(report)
+    command = [args.blender, "-b", "-P", script, "--", "--input", manifest, "--config", args.config, "--output", args.output, "--report", report]
+    ## Every worker gets one core's worth of threads so the workers don't compete for cores
+    env = dict(os.environ)
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        env.setdefault(name, "1")
+    timeout = args.timeout * len(shard) if args.timeout else None
+
+    error = None
+    try:
+        with open(log, "w") as logfile:
+            ret = subprocess.run(command, stdout=logfile, stderr=subprocess.STDOUT, env=env, timeout=timeout).returncode
+    except subprocess.TimeoutExpired:
+        error = f"Worker timed out after {timeout} s, see {log}"
+    results = read_report(report)
+    if error is None and len(results) < len(shard):
+        ## Blender died before bei_batch.py got through the shard
+        error = f"Blender exited with code {ret} before finishing, see {log}"
+
+    return results, error, log
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Embed codes in a batch of models with several Blender processes")
+    parser.add_argument("--input", required=True, help="folder of models, a single model, or a manifest (.json list or text file of paths)")
+    parser.add_argument("--config", required=True, help=".json object of BEI operator properties")
+    parser.add_argument("--output", required=True, help="folder to write the embedded models to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="long-lived Blender processes to share the models between (default: one per core)")
+    parser.add_argument("--retries", type=int, default=2, help="times to retry a failed model (default: 2)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per model, a worker is stopped after this times its model count")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="Blender executable (default: $BLENDER or blender)")
+    parser.add_argument("--summary", help="where to write the .json summary (default: <output>/summary.json)")
+    args = parser.parse_args(argv)
+    args.config = os.path.abspath(args.config)
+    args.output = os.path.abspath(args.output)
+    os.makedirs(os.path.join(args.output, "jobs"), exist_ok=True)
+
+    try:
+        models = find_models(args.input)
+    except ValueError as err:
+        parser.error(str(err))
+    jobs = {model: {"model": model, "status": "failed", "attempts": 0, "seconds": 0.0} for model in models}
+    pending = list(models)
+    start = time.perf_counter()
+    ## Every round charges at least one model an attempt, so the rounds run out after the retries do
+    rounds = 0
+    while pending:
+        shards = make_shards(pending, args.workers)
+        if rounds:
+            print(f"Retrying {len(pending)} models")
+        pending = []
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            futures = {pool.submit(run_worker, shard, args, f"{rounds}-{num}"): shard for num, shard in enumerate(shards)}
+            for future in as_completed(futures):
+                shard = futures[future]
+                results, error, log = future.result()
+                tried, untried = settle_shard(shard, results)
+                for model in tried:
+                    job = jobs[model]
+                    job["attempts"] += 1
+                    job["log"] = log
+                    if model in results:
+                        job["result"] = results[model]
+                        job["status"] = results[model]["status"]
+                        job["error"] = results[model].get("error")
+                        job["seconds"] += results[model]["seconds"]
+                    else:
+                        job["error"] = error
+                    if job["status"] == "done":
+                        print(f"done {model} ({job['seconds']:.1f} s, {job['attempts']} attempts)")
+                    elif job["attempts"] <= args.retries:
+                        pending.append(model)
+                    else:
+                        print(f"failed {model} ({job['attempts']} attempts)")
+                ## Models the worker never reached haven't used up an attempt
+                pending.extend(untried)
+        rounds += 1
+    wall = time.perf_counter() - start
+    jobs = list(jobs.values())
+
+    failed = sum(job["status"] != "done" for job in jobs)
+    summary = {
+        "models": len(jobs),
+        "done": len(jobs) - failed,
+        "failed": failed,
+        "workers": args.workers,
+        "wall_seconds": wall,
+        ## Time the models took to embed, one after another
+        "job_seconds": sum(job["seconds"] for job in jobs),
+        "jobs": jobs,
+    }
+    with open(args.summary or os.path.join(args.output, "summary.json"), "w") as summaryfile:
+        json.dump(summary, summaryfile, indent=2)
+    print(f"Embedded {summary['done']} of {len(jobs)} models in {wall:.1f} s ({summary['job_seconds']:.1f} s of work)")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,300 @@
+"""
+Times every stage of embedding codes on procedurally generated models, so a slow stage can be found
+and a change that slows one down is caught.
+
+Usage:
+    python benchmarks/bench_stages.py --output benchmarks/results/run.json
+    blender -b -P benchmarks/bench_stages.py -- --output benchmarks/results/run.json
+
+Run with plain Python, only the stages in bei_core are timed. Run inside Blender, the code import,
+projection and extrusion stages also go through the add-on and Blender meshes, like the add-on does.
+
+The models (see synthetic.py) are cubes, cylinders, spheres and scanned-looking height fields of
+--sizes faces each. The stages are:
+    segmentation   finding the flat patches (face index and patch hierarchy, caches cleared)
+    flattening     laying the largest patch flat
+    rasterization  building the occupancy quadtree of the flat patch
+    square search  finding the largest square over 18 rotations
+    code import    building the ArUco geometry (a Blender mesh inside Blender)
+    projection     projecting the planned codes onto the model (Blender only)
+    extrusion      solidifying the codes (and writing the Blender mesh inside Blender)
+    plan           plan_placements from start to finish, caches cleared
+
+Every stage is timed --repeat times and the best time is kept. --output writes the times as .json,
+which can be given back as --baseline: any stage more than --threshold slower than the baseline (and
+slower by at least --min-seconds, to ignore timer noise) is reported and the script exits with 1.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic
+
+if bpy is not None:
+    sys.path.insert(0, root)
+    import BEI
+    from BEI import bei_core
+else:
+    ## bei_core imports nothing from the add-on, so it loads on its own without Blender
+    sys.path.insert(0, os.path.join(root, "BEI"))
+    import bei_core
+
+
+## Settings every model is planned with, sized for models about 100 units across
+bench_options = {
+    "usinggeometric": True,
+    "uniformparam": "op1",
+    "codes": 4,
+    "sidelength": 10,
+    "fixedaruco": True,
+    "arucodict": "4X4_50",
+}
+
+def script_args(argv):
+    """
+    Parses the script's arguments, which come after "--" when run inside Blender.
+
+    Input:
+        argv (list of str, the full command line)
+    Return:
+        argparse Namespace
+    """
+    if bpy is not None:
+        argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    else:
+        argv = argv[1:]
+    parser = argparse.ArgumentParser(description="Time each stage of embedding codes on synthetic models")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000], help="number of faces of the models (default: 1k to 1M)")
+    parser.add_argument("--shapes", nargs="+", choices=sorted(synthetic.shapes), default=list(synthetic.shapes), help="models to generate (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="times to run each stage, the best time is kept")
+    parser.add_argument("--output", help="where to write the .json times")
+    parser.add_argument("--baseline", help=".json times of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="fraction slower than the baseline that counts as a regression (default: 0.2)")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="smallest slowdown in seconds that counts as a regression (default: 0.005)")
+
+    return parser.parse_args(argv)
+
+def best_time(func, repeat, reset=None):
+    """
+    Runs a function several times and keeps the fastest run.
+
+    Input:
+        func (function taking no arguments)
+        repeat (int number of runs)
+        reset (function run before every run and not timed, like clearing caches, or None)
+    Return:
+        seconds (float, fastest run)
+        result (what the last run of func returned)
+    """
+    best = math.inf
+    for _ in range(max(repeat, 1)):
+        if reset is not None:
+            reset()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+def clear_caches():
+    """
+    Forgets every mesh bei_core has analyzed, so the next analysis starts from scratch.
+    """
+    bei_core.mesh_indexes.clear()
+    bei_core.patch_hierarchies.clear()
+
+def flat_codes(plan, verts, faces):
+    """
+    Places a copy of a code at every planned marker, flat on the marker's plane, for the extrusion
+    stage when there is no Blender to project the codes.
+
+    Input:
+        plan (list of bei_core.MarkerPlacement)
+        verts (list of (x, y, 0) vertices of the code, 1 unit per cell)
+        faces (list of vertex index tuples)
+    Return:
+        (verts, loop_verts, loop_total) of all of the codes
+    """
+    code = np.array(verts, float)
+    ## Size the code so that it is sidelength across
+    code = code / np.ptp(code[:, :2], axis=0).max()
+    loops = np.array([ind for face in faces for ind in face])
+    totals = np.array([len(face) for face in faces])
+    codeverts = []
+    for placement in plan:
+        local = np.hstack([code * placement.sidelength, np.ones((len(code), 1))])
+        codeverts.append((local @ placement.frame.T)[:, :3])
+    count = len(code)
+
+    return np.concatenate(codeverts), np.concatenate([loops + num * count for num in range(len(plan))]), np.tile(totals, len(plan))
+
+def bench_model(co, loop_verts, loop_total, repeat):
+    """
+    Times every stage on one model.
+
+    Input:
+        (co, loop_verts, loop_total) of the model, as synthetic.py makes them
+        repeat (int times to run each stage)
+    Return:
+        times (dict of seconds by stage name, stages that can't run here are left out)
+    """
+    times = dict()
+    sharpness = bei_core.default_options["sharpness"]
+    maxfaces = bei_core.default_options["maxfaces"]
+    sidelength = bench_options["sidelength"]
+    obj = None
+    if bpy is not None:
+        ## The model as a Blender object, read back with Blender's own triangulation
+        obj = bpy.data.objects.new("Benchmark Model", BEI.write_mesh("Benchmark Model", co, loop_verts, loop_total))
+        bpy.context.scene.collection.objects.link(obj)
+        new_mesh = lambda: BEI.mesh_arrays(obj)
+    else:
+        new_mesh = lambda: bei_core.MeshArrays(co, loop_verts, loop_total)
+
+    ####### FLAT PATCHES #######
+
+    ## A new MeshArrays each run, so its fingerprint is computed again too
+    def segment():
+        mesh = new_mesh()
+        bei_core.mesh_index(mesh)
+        return mesh, bei_core.get_patch_hierarchy(mesh, maxfaces).patches(sharpness, False)
+    times["segmentation"], (mesh, patches) = best_time(segment, repeat, clear_caches)
+    group = patches[0][1]
+
+    times["flattening"], (flat, frame) = best_time(lambda: bei_core.flatten_patch(mesh.triangles()[np.isin(mesh.tri_face, group)]), repeat)
+
+    ## The grid patch_placements samples at accuracy 1
+    min_x, min_y = flat[:, :, :2].min(axis=(0, 1))
+    max_x, max_y = flat[:, :, :2].max(axis=(0, 1))
+    dimx = 301
+    dimy = int(dimx * ((max_y - min_y) / (max_x - min_x))) + 1
+    interval = (max_x - min_x) / dimx
+    startloc = (min_x, max_y, 1)
+    times["rasterization"], patchtree = best_time(lambda: bei_core.OccupancyQuadtree(flat, dimx, dimy, interval, startloc), repeat)
+
+    times["square search"], squares = best_time(lambda: patchtree.rotated_squares(1, np.radians(np.arange(0, 90, 5))), repeat)
+
+    ####### CODES #######
+
+    arucodict = bench_options["arucodict"]
+    def forget_code():
+        bei_core.aruco_codewords.clear()
+        if bpy is not None:
+            me = bpy.data.meshes.get(f"ArUco {arucodict} 0")
+            if me is not None:
+                bpy.data.meshes.remove(me)
+    if bpy is not None:
+        times["code import"], codedata = best_time(lambda: BEI.aruco_mesh(arucodict, 0), repeat, forget_code)
+    else:
+        times["code import"], (verts, faces) = best_time(lambda: bei_core.aruco_geometry(arucodict, 0), repeat, forget_code)
+
+    plan, warnings = bei_core.plan_placements(mesh, bench_options)
+
+    if bpy is not None:
+        ## The operator's own projection, from the plan to the collected code buffers
+        markers = BEI.marker_codes(plan, arucodict, codedata)
+        project = lambda: BEI.project_markers(markers, BEI.WorkingSurface(obj), sidelength / 12)[0]
+        if plan:
+            times["projection"], codes = best_time(project, repeat)
+        def extrude():
+            solid = bei_core.solidify(*codes, 0.6, 1.2)
+            me = BEI.write_mesh("Benchmark Codes", *solid)
+            bpy.data.meshes.remove(me)
+        if plan:
+            times["extrusion"] = best_time(extrude, repeat)[0]
+    elif plan:
+        codes = flat_codes(plan, verts, faces)
+        times["extrusion"] = best_time(lambda: bei_core.solidify(*codes, 0.6, 1.2), repeat)[0]
+
+    ####### WHOLE PLAN #######
+
+    times["plan"] = best_time(lambda: bei_core.plan_placements(new_mesh(), bench_options), repeat, clear_caches)[0]
+
+    if obj is not None:
+        me = obj.data
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(me)
+
+    return times
+
+def compare(results, baseline, threshold, min_seconds):
+    """
+    Prints every stage's time next to the baseline's and finds the stages that got slower.
+
+    Input:
+        results (dict of model results, as written to --output)
+        baseline (dict of model results of an earlier run, or None)
+        threshold (float fraction slower that counts as a regression)
+        min_seconds (float smallest slowdown that counts as a regression)
+    Return:
+        regressions (list of (model, stage, seconds, baseline seconds))
+    """
+    regressions = []
+    print(f"{'model':<18}{'stage':<16}{'seconds':>12}{'baseline':>12}{'change':>10}")
+    for model, result in results.items():
+        for stage, seconds in result["stages"].items():
+            before = (baseline or {}).get(model, {}).get("stages", {}).get(stage)
+            if before is None:
+                print(f"{model:<18}{stage:<16}{seconds:>12.4f}")
+                continue
+            change = seconds / before - 1 if before > 0 else 0
+            slower = change > threshold and seconds - before > min_seconds
+            if slower:
+                regressions.append((model, stage, seconds, before))
+            print(f"{model:<18}{stage:<16}{seconds:>12.4f}{before:>12.4f}{change:>+10.1%}" + ("  REGRESSION" if slower else ""))
+
+    return regressions
+
+def main(argv):
+    args = script_args(argv)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as basefile:
+            baseline = json.load(basefile)["results"]
+
+    results = dict()
+    for shape in args.shapes:
+        for size in args.sizes:
+            co, loop_verts, loop_total = synthetic.shapes[shape](size)
+            model = f"{shape}-{size}"
+            print(f"{model}: {len(loop_total)} faces", flush=True)
+            results[model] = {"faces": len(loop_total), "stages": bench_model(co, loop_verts, loop_total, args.repeat)}
+
+    if args.output:
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        meta = {
+            "mode": "blender" if bpy is not None else "python",
+            "blender": bpy.app.version_string if bpy is not None else None,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "repeat": args.repeat,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(args.output, "w") as outfile:
+            json.dump({"meta": meta, "results": results}, outfile, indent=2)
+
+    regressions = compare(results, baseline, args.threshold, args.min_seconds)
+    if regressions:
+        print(f"{len(regressions)} stages are more than {args.threshold:.0%} slower than the baseline")
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,128 @@
+"""
+Procedural test models for the benchmarks, as (co, loop_verts, loop_total) arrays that
+bei_core.MeshArrays takes directly.
+
+Every generator takes the number of faces wanted and gets as close to it as its layout allows.
+"""
+
+import math
+
+import numpy as np
+
+
+def grid_quads(rows, cols):
+    """
+    Lays quads over a (rows + 1) x (cols + 1) grid of vertices.
+
+    Input:
+        rows (int)
+        cols (int)
+    Return:
+        loop_verts (Numpy array, 4 loops per quad)
+    """
+    corner = (np.arange(rows)[:, None] * (cols + 1) + np.arange(cols)[None, :]).ravel()
+
+    return np.stack([corner, corner + 1, corner + cols + 2, corner + cols + 1], axis=1).ravel()
+
+def cube_faces(n):
+    """
+    Builds the 6 n x n grids of a subdivided unit cube centered on the origin.
+
+    Input:
+        n (int cuts along every edge)
+    Return:
+        (co, loop_verts, loop_total), with the vertices along the cube's edges repeated once per side
+    """
+    steps = np.linspace(-0.5, 0.5, n + 1)
+    u, v = [axis.ravel() for axis in np.meshgrid(steps, steps)]
+    sides = []
+    for axis in range(3):
+        for sign in (-1, 1):
+            co = np.empty((len(u), 3))
+            co[:, axis] = sign * 0.5
+            ## Swap the in-plane axes on one side so both sides face outwards
+            co[:, (axis + 1) % 3], co[:, (axis + 2) % 3] = (u, v) if sign > 0 else (v, u)
+            sides.append(co)
+    quads = grid_quads(n, n)
+    co = np.concatenate(sides)
+    loop_verts = np.concatenate([quads + ind * (n + 1)**2 for ind in range(6)])
+
+    return co, loop_verts, np.full(6 * n * n, 4)
+
+def weld(co, loop_verts, loop_total):
+    """
+    Merges repeated vertices so that faces meeting at them are connected.
+
+    Input:
+        (co, loop_verts, loop_total) of a mesh
+    Return:
+        (co, loop_verts, loop_total) with every position stored once
+    """
+    keys, first, welded = np.unique(np.round(co, 9), axis=0, return_index=True, return_inverse=True)
+
+    return co[first], welded.reshape(-1)[loop_verts], loop_total
+
+def cube(faces):
+    """
+    Subdivided cube, 100 units across.
+    """
+    n = max(int(round(math.sqrt(faces / 6))), 1)
+    co, loop_verts, loop_total = weld(*cube_faces(n))
+
+    return co * 100, loop_verts, loop_total
+
+def sphere(faces):
+    """
+    Subdivided sphere made by pushing a subdivided cube out onto a sphere of radius 50.
+    """
+    n = max(int(round(math.sqrt(faces / 6))), 1)
+    co, loop_verts, loop_total = weld(*cube_faces(n))
+
+    return co / np.linalg.norm(co, axis=1)[:, None] * 50, loop_verts, loop_total
+
+def cylinder(faces):
+    """
+    Cylinder of radius 30 and height 100, with quads around the side and one n-gon at each end.
+    """
+    segments = max(int(round(math.sqrt(faces))), 3)
+    rings = max(int(round(faces / segments)), 1)
+    angle = np.linspace(0, 2 * math.pi, segments, endpoint=False)
+    height = np.linspace(0, 100, rings + 1)
+    co = np.stack([np.tile(30 * np.cos(angle), rings + 1), np.tile(30 * np.sin(angle), rings + 1), np.repeat(height, segments)], axis=1)
+    ## Quads around the side, wrapping from the last segment back to the first
+    ring = np.arange(rings)[:, None] * segments
+    seg = np.arange(segments)[None, :]
+    nxt = (seg + 1) % segments
+    side = np.stack([ring + seg, ring + nxt, ring + segments + nxt, ring + segments + seg], axis=2).reshape(-1)
+    bottom = np.arange(segments)[::-1]
+    top = rings * segments + np.arange(segments)
+    loop_verts = np.concatenate([side, bottom, top])
+    loop_total = np.concatenate([np.full(rings * segments, 4), [segments, segments]])
+
+    return co, loop_verts, loop_total
+
+def scan(faces, seed=0):
+    """
+    Scanned-looking surface: a 100 x 100 triangulated height field of gentle hills with jitter
+    and noise on every vertex, like a mesh from a 3D scanner.
+    """
+    n = max(int(round(math.sqrt(faces / 2))), 1)
+    rng = np.random.default_rng(seed)
+    steps = np.linspace(0, 100, n + 1)
+    x, y = [axis.ravel() for axis in np.meshgrid(steps, steps)]
+    spacing = 100 / n
+    x = x + rng.uniform(-0.2, 0.2, len(x)) * spacing
+    y = y + rng.uniform(-0.2, 0.2, len(y)) * spacing
+    z = 5 * np.sin(x / 15) * np.cos(y / 20) + rng.normal(0, 0.05, len(x))
+    quads = grid_quads(n, n).reshape(-1, 4)
+    tris = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]], axis=1).reshape(-1)
+
+    return np.stack([x, y, z], axis=1), tris, np.full(2 * n * n, 3)
+
+## Every test model, by name
+shapes = {
+    "cube": cube,
+    "cylinder": cylinder,
+    "sphere": sphere,
+    "scan": scan,
+}
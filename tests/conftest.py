@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+## bei_core imports nothing from the add-on, so the tests load it on its own without Blender
+sys.path.insert(0, os.path.join(root, "BEI"))
+## bei_scheduler.py doesn't need Blender either
+sys.path.insert(0, root)
+import bei_core
+
+
+def box_mesh(n, size=100.0):
+    """
+    Builds a cube of the given size centered on the origin, each side cut into n x n quads.
+    """
+    steps = np.linspace(-size / 2, size / 2, n + 1)
+    u, v = [axis.ravel() for axis in np.meshgrid(steps, steps)]
+    corner = (np.arange(n)[:, None] * (n + 1) + np.arange(n)[None, :]).ravel()
+    quads = np.stack([corner, corner + 1, corner + n + 2, corner + n + 1], axis=1)
+    co = []
+    loops = []
+    for axis in range(3):
+        for sign in (-1, 1):
+            side = np.empty((len(u), 3))
+            side[:, axis] = sign * size / 2
+            side[:, (axis + 1) % 3], side[:, (axis + 2) % 3] = (u, v) if sign > 0 else (v, u)
+            loops.append(quads + len(co) * len(u))
+            co.append(side)
+    co = np.concatenate(co)
+    ## Weld the sides together at the cube's edges
+    keys, first, welded = np.unique(np.round(co, 6), axis=0, return_index=True, return_inverse=True)
+    loop_verts = welded.reshape(-1)[np.concatenate(loops).ravel()]
+
+    return bei_core.MeshArrays(co[first], loop_verts, np.full(6 * n * n, 4))
+
+@pytest.fixture
+def cube():
+    return box_mesh(10)
+
+@pytest.fixture
+def fine_cube():
+    return box_mesh(30)
@@ -0,0 +1,53 @@
+import collections
+
+import numpy as np
+
+import bei_core
+
+
+def directed_edges(loop_verts, loop_total):
+    loop_start, loop_next = bei_core.polygon_loops(loop_total)
+    return list(zip(loop_verts.tolist(), loop_verts[loop_next].tolist()))
+
+def code_arrays(arucoid):
+    verts, faces = bei_core.aruco_geometry("4X4_50", arucoid)
+    return np.array(verts, float), np.array([ind for face in faces for ind in face]), np.array([len(face) for face in faces])
+
+def test_aruco_covers_its_black_cells():
+    for arucoid in range(50):
+        verts, faces = bei_core.aruco_geometry("4X4_50", arucoid)
+        verts = np.array(verts)
+        area = 0
+        for face in faces:
+            x, y = verts[face, 0], verts[face, 1]
+            area += 0.5 * (x @ np.roll(y, -1) - y @ np.roll(x, -1))
+        ## Counter-clockwise faces, one unit of area per black cell
+        assert np.isclose(area, bei_core.aruco_cells("4X4_50", arucoid).sum())
+
+def test_aruco_has_no_t_junctions():
+    for arucoid in range(50):
+        verts, loop_verts, loop_total = code_arrays(arucoid)
+        edges = directed_edges(loop_verts, loop_total)
+        assert len(set(edges)) == len(edges)
+        ## Every vertex lying inside an edge would be a T-junction
+        for a, b in edges:
+            ab = verts[b] - verts[a]
+            t = (verts - verts[a]) @ ab / (ab @ ab)
+            off = np.linalg.norm(verts - verts[a] - t[:, None] * ab, axis=1)
+            assert not ((t > 1e-9) & (t < 1 - 1e-9) & (off < 1e-9)).any()
+
+def test_solidified_aruco_is_closed_without_inner_walls():
+    for arucoid in range(50):
+        verts, loop_verts, loop_total = code_arrays(arucoid)
+        flat_edges = directed_edges(loop_verts, loop_total)
+        border = [edge for edge in flat_edges if edge[::-1] not in set(flat_edges)]
+        solid_verts, solid_loops, solid_totals = bei_core.solidify(verts, loop_verts, loop_total, 0.5, 1.0)
+        ## One wall per border edge and none inside the code: the walls are as long as the code's outline
+        assert len(solid_totals) - 2 * len(loop_total) == len(border)
+        cells = np.pad(bei_core.aruco_cells("4X4_50", arucoid), 1)
+        outline = (cells[1:] != cells[:-1]).sum() + (cells[:, 1:] != cells[:, :-1]).sum()
+        assert np.isclose(sum(np.linalg.norm(verts[b] - verts[a]) for a, b in border), outline)
+        ## Closed: every edge is used as often in one direction as in the other (cells touching at a
+        ## corner share a vertical edge between two pairs of walls)
+        edges = collections.Counter(directed_edges(solid_loops, solid_totals))
+        assert edges == collections.Counter({(b, a): n for (a, b), n in edges.items()})
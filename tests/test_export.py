@@ -0,0 +1,60 @@
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+
+import bei_core
+
+ns = {"m": "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"}
+
+def tetrahedron(shift=0.0):
+    co = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], float) + shift
+    return co, np.array([[0, 2, 1], [0, 1, 3], [0, 3, 2], [1, 2, 3]])
+
+def test_join_buffers_offsets_the_triangles():
+    co, tri_verts = bei_core.join_buffers([tetrahedron(), tetrahedron(5)])
+    assert co.shape == (8, 3) and tri_verts.shape == (8, 3)
+    assert (tri_verts[4:] == tetrahedron()[1] + 4).all()
+    assert (co[tri_verts[4:]] == tetrahedron(5)[0][tetrahedron()[1]]).all()
+    co, tri_verts = bei_core.join_buffers([])
+    assert co.shape == (0, 3) and tri_verts.shape == (0, 3)
+
+def test_write_stl_round_trip(tmp_path):
+    co, tri_verts = tetrahedron()
+    path = tmp_path / "tet.stl"
+    bei_core.write_stl(str(path), co, tri_verts)
+    data = path.read_bytes()
+    assert len(data) == 80 + 4 + 50 * 4
+    assert data[:80].startswith(b"Binary STL") and not data[:5] == b"solid"
+    assert np.frombuffer(data[80:84], "<u4")[0] == 4
+    records = np.frombuffer(data[84:], np.dtype([("normal", "<f4", 3), ("tri", "<f4", (3, 3)), ("attr", "<u2")]))
+    assert np.allclose(records["tri"], co[tri_verts])
+    ## Unit normals pointing out of the tetrahedron
+    assert np.allclose(np.linalg.norm(records["normal"], axis=1), 1)
+    assert (np.einsum("ij,ij->i", records["normal"], records["tri"].mean(axis=1) - co.mean(axis=0)) > 0).all()
+
+def test_write_3mf_round_trip(tmp_path):
+    path = tmp_path / "parts.3mf"
+    bei_core.write_3mf(str(path), [("Model", "#FFFFFF", *tetrahedron()), ("Code", "#000000", *tetrahedron(5))])
+    with zipfile.ZipFile(path) as package:
+        assert sorted(package.namelist()) == ["3D/3dmodel.model", "[Content_Types].xml", "_rels/.rels"]
+        assert "/3D/3dmodel.model" in package.read("_rels/.rels").decode()
+        model = ET.fromstring(package.read("3D/3dmodel.model"))
+    assert [base.get("name") for base in model.findall("m:resources/m:basematerials/m:base", ns)] == ["Model", "Code"]
+    objects = model.findall("m:resources/m:object", ns)
+    assert [(obj.get("id"), obj.get("pindex")) for obj in objects] == [("2", "0"), ("3", "1")]
+    for obj, shift in zip(objects, (0, 5)):
+        verts = np.array([[float(vert.get(axis)) for axis in "xyz"] for vert in obj.findall("m:mesh/m:vertices/m:vertex", ns)])
+        tris = np.array([[int(tri.get(v)) for v in ("v1", "v2", "v3")] for tri in obj.findall("m:mesh/m:triangles/m:triangle", ns)])
+        assert np.allclose(verts, tetrahedron(shift)[0])
+        assert (tris == tetrahedron()[1]).all()
+    assert [item.get("objectid") for item in model.findall("m:build/m:item", ns)] == ["2", "3"]
+
+def test_write_3mf_skips_empty_bodies(tmp_path):
+    path = tmp_path / "model.3mf"
+    bei_core.write_3mf(str(path), [("Model", "#FFFFFF", *tetrahedron()), ("Code", "#000000", np.empty((0, 3)), np.empty((0, 3), int))])
+    with zipfile.ZipFile(path) as package:
+        model = ET.fromstring(package.read("3D/3dmodel.model"))
+    assert [obj.get("name") for obj in model.findall("m:resources/m:object", ns)] == ["Model"]
+    assert len(model.findall("m:resources/m:basematerials/m:base", ns)) == 1
+    assert len(model.findall("m:build/m:item", ns)) == 1
@@ -0,0 +1,60 @@
+import numpy as np
+
+import bei_core
+
+
+def bumpy_tube(segments=60, rings=40, seed=0):
+    ## Open tube of quads with some noise, so neighbouring faces meet at many different angles
+    rng = np.random.default_rng(seed)
+    angle = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    radius = 30 + rng.normal(0, 0.3, (rings + 1, segments))
+    co = np.stack([radius * np.cos(angle), radius * np.sin(angle), np.repeat(np.linspace(0, 100, rings + 1)[:, None], segments, axis=1)], axis=2).reshape(-1, 3)
+    ring = np.arange(rings)[:, None] * segments
+    seg = np.arange(segments)[None, :]
+    nxt = (seg + 1) % segments
+    loop_verts = np.stack([ring + seg, ring + nxt, ring + segments + nxt, ring + segments + seg], axis=2).ravel()
+
+    return bei_core.MeshArrays(co, loop_verts, np.full(rings * segments, 4))
+
+def patch_sets(patches):
+    return {frozenset(group.tolist()) for size, group in patches}
+
+def test_proxy_patches_match_the_full_mesh():
+    mesh = bumpy_tube()
+    index = bei_core.mesh_index(mesh)
+    exact = bei_core.PatchHierarchy(index.normals, index.areas, index.pair_a, index.pair_b, index.link_angle)
+    proxy = bei_core.ProxyHierarchy(index, 300)
+    for sharpness in (proxy.angle, 0.5, 1.0):
+        assert patch_sets(proxy.patches(sharpness, False)) == patch_sets(exact.patches(sharpness, False))
+    ## Below its angle the proxy's patches are made of whole clusters
+    for size, group in proxy.patches(0.05, False):
+        clusters = np.unique(proxy.labels[group])
+        assert np.isin(proxy.labels, clusters).sum() == len(group)
+
+def test_proxy_size_follows_maxfaces(fine_cube):
+    ## The noise on the tube means neighbouring faces rarely line up, so the clusters take in sharper bends
+    mesh = bumpy_tube()
+    proxy = bei_core.ProxyHierarchy(bei_core.mesh_index(mesh), 300)
+    assert proxy.labels.max() + 1 <= 2 * 300
+    assert bei_core.proxy_angle < proxy.angle <= bei_core.proxy_max_angle
+    ## On a clean mesh the clusters stay flat
+    proxy = bei_core.ProxyHierarchy(bei_core.mesh_index(fine_cube), 750)
+    assert proxy.labels.max() + 1 <= 2 * 750
+    assert proxy.angle == bei_core.proxy_angle
+    assert patch_sets(proxy.patches(0.1, False)) == {frozenset(group.tolist()) for size, group in bei_core.get_patch_hierarchy(fine_cube).patches(0.1, False)}
+
+def test_proxy_falls_back_when_it_barely_shrinks():
+    mesh = bumpy_tube()
+    bei_core.patch_hierarchies.clear()
+    assert isinstance(bei_core.get_patch_hierarchy(mesh, 300), bei_core.ProxyHierarchy)
+    assert isinstance(bei_core.get_patch_hierarchy(mesh, 1300), bei_core.PatchHierarchy)
+
+def test_proxy_is_reused_for_every_sharpness():
+    mesh = bumpy_tube()
+    bei_core.patch_hierarchies.clear()
+    hierarchy = bei_core.get_patch_hierarchy(mesh, 300)
+    assert isinstance(hierarchy, bei_core.ProxyHierarchy)
+    for sharpness in (0.05, 0.1, 0.5):
+        bei_core.plan_placements(mesh, {"usinggeometric": True, "uniformparam": "op1", "codes": 2, "sidelength": 5, "sharpness": sharpness, "maxfaces": 300})
+        assert bei_core.get_patch_hierarchy(mesh, 300) is hierarchy
+    assert len(bei_core.patch_hierarchies) == 1
@@ -0,0 +1,179 @@
+import numpy as np
+
+import bei_core
+
+
+def on_cube_side(point, size=100.0):
+    return np.isclose(np.abs(point), size / 2, atol=1e-6).any() and (np.abs(point) <= size / 2 + 1e-6).all()
+
+def test_whole_object_places_a_marker_on_a_side(cube):
+    plan, warnings = bei_core.plan_placements(cube, {"usinggeometric": True, "uniformparam": "op1", "codes": 1, "sidelength": 10, "fixedaruco": True})
+    assert warnings == []
+    assert len(plan) == 1
+    placement = plan[0]
+    assert placement.arucoid == 0
+    assert placement.sidelength == 10
+    assert on_cube_side(placement.center)
+    ## The code faces straight out of the side it sits on
+    normal = placement.frame[:3, 2]
+    side = np.argmax(np.abs(placement.center))
+    assert np.isclose(abs(normal[side]), 1)
+    assert np.sign(normal[side]) == np.sign(placement.center[side])
+    ## The frame is a rotation, the marker size is applied separately
+    assert np.allclose(placement.frame[:3, :3].T @ placement.frame[:3, :3], np.eye(3))
+
+def test_manual_mode_places_a_marker_at_each_selected_face(cube):
+    selected = [5, 250, 530]
+    plan, warnings = bei_core.plan_placements(cube, {"sidelength": 10}, selected)
+    assert len(plan) == 3
+    index = bei_core.mesh_index(cube)
+    for face, placement in zip(selected, plan):
+        ## Each marker lies on the side of its selected face
+        normal = index.normals[face]
+        assert np.isclose(placement.frame[:3, 2] @ normal, 1)
+        assert np.isclose((placement.center - index.centers[face]) @ normal, 0, atol=1e-6)
+        assert placement.arucoid is None
+
+def test_sequential_ids_stop_at_the_end_of_the_dictionary(cube):
+    options = {"sidelength": 10, "sequential": True, "startingat": 48, "arucodict": "4X4_50"}
+    plan, warnings = bei_core.plan_placements(cube, options, [0, 150, 300, 450])
+    assert [placement.arucoid for placement in plan] == [48, 49]
+    assert len(warnings) == 1
+
+def test_fixed_id_outside_the_dictionary_falls_back_to_zero(cube):
+    plan, warnings = bei_core.plan_placements(cube, {"sidelength": 10, "fixedaruco": True, "fixedarucoid": 70}, [0])
+    assert plan[0].arucoid == 0
+    assert len(warnings) == 1
+
+def test_fixed_distance_markers_keep_their_distance(cube):
+    options = {"usinggeometric": True, "uniformparam": "op1", "intermarker": True, "uniformdist": 5, "sidelength": 10}
+    plan, warnings = bei_core.plan_placements(cube, options)
+    assert len(plan) > 6
+    centers = np.array([placement.center for placement in plan])
+    for center in centers:
+        assert on_cube_side(center)
+    distances = np.linalg.norm(centers[:, None] - centers[None], axis=2) + np.eye(len(centers)) * 1e9
+    ## Markers are spaced by their circumscribed circles plus the gap, so they can't come closer at any rotation
+    assert distances.min() >= 10 * np.sqrt(2) + 5 - 1e-6
+
+def test_plan_works_on_a_proxy(fine_cube):
+    ## More faces than maxfaces, so the patches are found on a proxy of the cube
+    plan, warnings = bei_core.plan_placements(fine_cube, {"usinggeometric": True, "uniformparam": "op1", "codes": 3, "sidelength": 10, "maxfaces": 1000})
+    assert len(plan) == 3
+    for placement in plan:
+        assert on_cube_side(placement.center)
+
+def bottom_edge(frame, code_co):
+    ## Direction of the code's bottom edge in world space
+    edge = code_co[np.argmax(code_co[:, 0] - code_co[:, 1])] - code_co[np.argmax(-code_co[:, 0] - code_co[:, 1])]
+    edge = frame[:3, :3] @ edge
+
+    return edge / np.linalg.norm(edge)
+
+def test_align_frame_levels_the_bottom_edge():
+    code_co = np.array(bei_core.aruco_geometry("4X4_50", 3)[0], float)
+    rng = np.random.default_rng(5)
+    ## Vertical walls, walls tilted towards and away from the plane, and random surfaces
+    normals = [(1, 0, 0), (0, -1, 0), (1, 1, 0), (1, 0, 1), (0, -1, 0.5), (1, 1, -2)] + list(rng.normal(size=(10, 3)))
+    for plane, plane_norm in bei_core.plane_normals.items():
+        for normal in normals:
+            if abs(np.dot(normal, plane_norm)) > 0.99 * np.linalg.norm(normal):
+                continue
+            for start in (0.0, 0.3, 1.2, 2.5, -0.7, -2.9):
+                frame = bei_core.normal_frame(rng.normal(size=3), normal) @ bei_core.rotation_z(start)
+                aligned = bei_core.align_frame(frame, code_co, (1, 1), plane_norm, 0)
+                assert abs(bottom_edge(aligned, code_co) @ plane_norm) < 1e-9
+                ## Only the code's rotation about its own normal changes
+                assert np.allclose(aligned[:3, 2], frame[:3, 2])
+                assert np.allclose(aligned[:3, 3], frame[:3, 3])
+
+def test_align_frame_matches_the_tilt_on_vertical_walls():
+    ## A wall facing +X with the code turned a little: aligning to XY turns it back by the tilt, then half a turn
+    code_co = np.array(bei_core.aruco_geometry("4X4_50", 0)[0], float)
+    frame = bei_core.normal_frame((0, 0, 0), (1, 0, 0)) @ bei_core.rotation_z(0.3)
+    aligned = bei_core.align_frame(frame, code_co, (1, 1), (0, 0, 1), 0)
+    assert np.allclose(aligned, frame @ bei_core.rotation_z(-0.3 + np.pi))
+
+def test_align_frame_adds_the_align_angle():
+    code_co = np.array(bei_core.aruco_geometry("4X4_50", 0)[0], float)
+    frame = bei_core.normal_frame((0, 0, 0), (0, 1, 0)) @ bei_core.rotation_z(1.0)
+    aligned = bei_core.align_frame(frame, code_co, (1, 1), (0, 0, 1), 30)
+    assert np.isclose(abs(bottom_edge(aligned, code_co) @ (0, 0, 1)), np.sin(np.radians(30)))
+
+def test_region_mode_fits_every_marker_on_one_side(cube):
+    ## The 100 faces of one side of the cube
+    side = np.nonzero(np.isclose(bei_core.mesh_index(cube).centers[:, 2], 50))[0]
+    ## Without the rotation search the side may be laid flat along its diagonal, so only small markers are sure to fit
+    for sidelength, searchrotation in ((10, True), (10, False), (40, True)):
+        options = {"usinggeometric": True, "uniformparam": "op2", "codes": 4, "sidelength": sidelength, "searchrotation": searchrotation}
+        plan, warnings = bei_core.plan_placements(cube, options, side)
+        assert len(plan) == 4 and warnings == []
+        centers = np.array([placement.center for placement in plan])
+        distances = np.linalg.norm(centers[:, None] - centers[None], axis=2) + np.eye(4) * 1e9
+        assert distances.min() >= sidelength - 1e-6
+
+def test_region_mode_warns_when_markers_do_not_fit(cube):
+    side = np.nonzero(np.isclose(bei_core.mesh_index(cube).centers[:, 2], 50))[0]
+    plan, warnings = bei_core.plan_placements(cube, {"usinggeometric": True, "uniformparam": "op2", "codes": 4, "sidelength": 60}, side)
+    assert len(plan) == 1
+    assert warnings == ["Only 1 of 4 markers fit at side length 60"]
+
+def test_region_mode_with_nothing_selected_warns(cube):
+    plan, warnings = bei_core.plan_placements(cube, {"usinggeometric": True, "uniformparam": "op2", "codes": 4, "sidelength": 10}, [])
+    assert plan == []
+    assert warnings == ["Only 0 of 4 markers fit at side length 10"]
+
+def test_whole_object_places_every_marker(cube):
+    plan, warnings = bei_core.plan_placements(cube, {"usinggeometric": True, "uniformparam": "op1", "codes": 8, "sidelength": 10})
+    assert len(plan) == 8 and warnings == []
+
+def test_spread_mode_picks_markers_far_apart(cube):
+    options = {"usinggeometric": True, "uniformparam": "op1", "fixednum": True, "spreadcodes": True, "codes": 6, "sidelength": 10}
+    plan, warnings = bei_core.plan_placements(cube, options)
+    assert len(plan) == 6 and warnings == []
+    centers = np.array([placement.center for placement in plan])
+    distances = np.linalg.norm(centers[:, None] - centers[None], axis=2) + np.eye(len(centers)) * 1e9
+    assert distances.min() >= 10 * np.sqrt(2) - 1e-6
+    ## Spread over the whole cube rather than bunched on its largest patches
+    assert distances.min() > 50
+    for placement in plan:
+        center = placement.center
+        side = np.argmax(np.abs(center))
+        assert on_cube_side(center)
+        ## The whole marker, at any rotation, lies on its side of the cube
+        assert (np.abs(np.delete(center, side)) <= 50 - 10 / np.sqrt(2) + 1e-6).all()
+        assert np.isclose(abs(placement.frame[side, 2]), 1)
+
+def test_farthest_point_samples():
+    rng = np.random.default_rng(2)
+    candidates = rng.uniform(0, 100, (5000, 3))
+    picked = bei_core.farthest_point_samples(candidates, 20)
+    assert len(picked) == len(set(picked)) == 20
+    points = candidates[picked]
+    distances = np.linalg.norm(points[:, None] - points[None], axis=2) + np.eye(20) * 1e9
+    ## Every pick is the candidate furthest from the picks before it
+    for num in range(2, 20):
+        nearest = np.linalg.norm(candidates[:, None] - points[None, :num], axis=2).min(axis=1)
+        assert np.isclose(nearest[picked[num]], nearest.max())
+    ## Picking stops once nothing is min_distance away from the picks
+    spaced = bei_core.farthest_point_samples(candidates, 1000, 40)
+    points = candidates[spaced]
+    distances = np.linalg.norm(points[:, None] - points[None], axis=2) + np.eye(len(points)) * 1e9
+    assert 1 < len(spaced) < 1000 and distances.min() >= 40
+    assert np.linalg.norm(candidates[:, None] - points[None], axis=2).min(axis=1).max() < 40
+    assert bei_core.farthest_point_samples(candidates[:0], 3) == []
+
+def test_ignore_bottom_leaves_the_bottom_side_empty(cube):
+    index = bei_core.mesh_index(cube)
+    hierarchy = bei_core.PatchHierarchy(index.normals, index.areas, index.pair_a, index.pair_b, index.link_angle)
+    assert len(hierarchy.patches(0.1, False)) == 6
+    patches = hierarchy.patches(0.1, True)
+    assert len(patches) == 5
+    for size, group in patches:
+        assert (index.normals[group, 2] > -0.5).all()
+    ## Whole object ignoring the bottom (op3) puts no marker underneath
+    plan, warnings = bei_core.plan_placements(cube, {"usinggeometric": True, "uniformparam": "op3", "codes": 10, "sidelength": 10})
+    assert len(plan) == 10 and warnings == []
+    for placement in plan:
+        assert on_cube_side(placement.center)
+        assert placement.center[2] > -50 + 1e-6
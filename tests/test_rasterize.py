@@ -0,0 +1,100 @@
+import numpy as np
+
+import bei_core
+
+
+def brute_rasterize(tris, dimx, dimy, interval, startloc):
+    out = np.zeros((dimy, dimx), bool)
+    for row in range(dimy):
+        for col in range(dimx):
+            p = np.array([startloc[0] + col * interval, startloc[1] - row * interval])
+            for tri in tris[:, :, :2]:
+                edges = [(tri[(i + 1) % 3] - tri[i], p - tri[i]) for i in range(3)]
+                d = [e[0] * q[1] - e[1] * q[0] for e, q in edges]
+                if min(d) >= -1e-12 or max(d) <= 1e-12:
+                    out[row, col] = True
+                    break
+    return out
+
+def test_rasterize_square():
+    ## Two triangles covering [0, 1] x [0, 1], sampled every 0.1
+    tris = np.array([[[0, 0, 0], [1, 0, 0], [1, 1, 0]], [[0, 0, 0], [1, 1, 0], [0, 1, 0]]], float)
+    grid = bei_core.rasterize_triangles(tris, 15, 15, 0.1, (-0.25, 1.25, 1))
+    expected = np.zeros((15, 15), bool)
+    ## x = -0.25 + 0.1 col is in [0, 1] for cols 3 to 12, y = 1.25 - 0.1 row for rows 3 to 12
+    expected[3:13, 3:13] = True
+    assert (grid == expected).all()
+
+def test_rasterize_matches_point_in_triangle():
+    rng = np.random.default_rng(3)
+    tris = rng.uniform(0, 10, (12, 3, 3))
+    tris[:, :, 2] = 0
+    dimx, dimy, interval, startloc = 41, 37, 0.27, (-0.3, 10.1, 1)
+    grid = bei_core.rasterize_triangles(tris, dimx, dimy, interval, startloc)
+    expected = brute_rasterize(tris, dimx, dimy, interval, startloc)
+    ## Points lying exactly on an edge may go either way
+    assert (grid != expected).sum() <= 2
+
+def test_quadtree_matches_dense_grid():
+    rng = np.random.default_rng(4)
+    tris = rng.uniform(0, 10, (20, 3, 3))
+    dimx, dimy, interval, startloc = 97, 83, 0.11, (-0.2, 10.2, 1)
+    tree = bei_core.OccupancyQuadtree(tris, dimx, dimy, interval, startloc)
+    assert (tree.to_array() == bei_core.rasterize_triangles(tris, dimx, dimy, interval, startloc)).all()
+
+def test_quadtree_of_a_patch_missing_every_grid_point():
+    ## A sliver thinner than the grid spacing covers no grid point
+    tris = np.array([[[0, 0, 0], [100, 0, 0], [50, 0.01, 0]]], float)
+    dimx, dimy, interval, startloc = 301, 1, 100 / 301, (0, 0.5, 1)
+    tree = bei_core.OccupancyQuadtree(tris, dimx, dimy, interval, startloc)
+    dense = bei_core.rasterize_triangles(tris, dimx, dimy, interval, startloc)
+    assert not dense.any()
+    assert (tree.to_array() == dense).all()
+    inside, outside = tree.classify(np.zeros(1, int), np.zeros(1, int), 512)
+    assert outside.all() and not inside.any()
+    assert not tree.window(0, 1, 0, dimx).any()
+    assert tree.pack_squares(3, 5) == []
+    assert tree.largest_squares(2) == []
+
+def test_quadtree_packs_like_the_dense_grid():
+    rng = np.random.default_rng(6)
+    tris = rng.uniform(0, 10, (20, 3, 3))
+    dimx, dimy, interval, startloc = 97, 183, 0.055, (-0.2, 10.2, 1)
+    tree = bei_core.OccupancyQuadtree(tris, dimx, dimy, interval, startloc)
+    dense = bei_core.pack_squares(tree.to_array(), 9, 13)
+    assert len(dense) > 0
+    ## Bands of a few rows at a time give the same packing
+    for max_cells in (512 * 512, 40 * dimx, 20 * dimx):
+        assert tree.pack_squares(9, 13, max_cells=max_cells) == dense
+
+def square_points(center, angle, side):
+    ## Grid points of a rotated square, as (row, col) in the grid it was found in
+    offsets = np.arange(side) - (side - 1) / 2
+    dx, dy = [axis.ravel() for axis in np.meshgrid(offsets, offsets)]
+    cos, sin = np.cos(-angle), np.sin(-angle)
+
+    return np.rint(center[0] + sin * dx + cos * dy).astype(int), np.rint(center[1] + cos * dx - sin * dy).astype(int)
+
+def test_quadtree_refines_rotated_squares_in_windows():
+    ## A rotated rectangle, large enough to need coarse levels at a small max_cells
+    corners = np.array([[0, 0], [40, 12], [28, 52], [-12, 40]], float)
+    tris = np.zeros((2, 3, 3))
+    tris[0, :, :2] = corners[[0, 1, 2]]
+    tris[1, :, :2] = corners[[0, 2, 3]]
+    dimx, dimy, interval, startloc = 261, 321, 0.2, (-12, 52, 1)
+    tree = bei_core.OccupancyQuadtree(tris, dimx, dimy, interval, startloc)
+    angles = np.radians(np.arange(0, 90, 5))
+    largest = tree.rotated_squares(1, angles)[0][2]
+    M = tree.to_array()
+    for max_cells in (2 * 1024 * 1024, 256 * 1024):
+        ## The largest square is about as large as the one found on the whole grid
+        assert tree.rotated_squares(1, angles, max_cells=max_cells)[0][2] >= 0.9 * largest
+        squares = tree.rotated_squares(4, angles, max_cells=max_cells, maxside=80)
+        assert len(squares) == 4
+        assert all(0.8 * 80 <= side <= 80 for angle, center, side in squares)
+        taken = np.zeros(M.shape, int)
+        for angle, center, side in squares:
+            rows, cols = square_points(center, angle, side)
+            assert M[rows, cols].mean() > 0.99
+            taken[rows, cols] += 1
+        assert taken.max() == 1
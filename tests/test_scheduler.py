@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from bei_scheduler import find_models, make_shards, read_report, settle_shard
+
+
+def test_find_models_manifest(tmp_path):
+    (tmp_path / "models").mkdir()
+    for name in ("b.stl", "a.obj", "notes.txt"):
+        (tmp_path / "models" / name).write_text("")
+    assert find_models(str(tmp_path / "models")) == [str(tmp_path / "models" / name) for name in ("a.obj", "b.stl")]
+    ## Relative paths are relative to the manifest, absolute paths are kept
+    manifest = tmp_path / "models.json"
+    manifest.write_text(json.dumps(["models/a.obj", str(tmp_path / "models" / "b.stl")]))
+    assert find_models(str(manifest)) == [str(tmp_path / "models" / name) for name in ("a.obj", "b.stl")]
+
+def test_make_shards():
+    models = [f"{num}.stl" for num in range(10)]
+    shards = make_shards(models, 4)
+    assert len(shards) == 4
+    assert sorted(model for shard in shards for model in shard) == sorted(models)
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+    ## Never more workers than models
+    assert make_shards(models[:2], 8) == [["0.stl"], ["1.stl"]]
+
+def test_settle_shard_after_crash(tmp_path):
+    shard = ["a.stl", "b.stl", "c.stl", "d.stl"]
+    report = tmp_path / "report.json"
+    report.write_text(json.dumps([{"model": "a.stl", "status": "done"}, {"model": "b.stl", "status": "failed"}]))
+    results = read_report(str(report))
+    ## c.stl was being embedded when the worker died, d.stl was never reached
+    assert settle_shard(shard, results) == (["a.stl", "b.stl", "c.stl"], ["d.stl"])
+    assert settle_shard(shard, read_report(str(tmp_path / "missing.json"))) == (["a.stl"], shard[1:])
+    full = {model: {"model": model, "status": "done"} for model in shard}
+    assert settle_shard(shard, full) == (shard, [])
+
+def test_find_models_rejects_clashing_names(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+    (tmp_path / "a" / "part.stl").write_text("")
+    (tmp_path / "b" / "Part.obj").write_text("")
+    manifest = tmp_path / "models.txt"
+    manifest.write_text("a/part.stl\nb/Part.obj\n")
+    with pytest.raises(ValueError, match="part.stl"):
+        find_models(str(manifest))
@@ -0,0 +1,71 @@
+import numpy as np
+
+import bei_core
+
+
+def brute_square_table(M):
+    rows, cols = M.shape
+    S = np.zeros(M.shape, int)
+    for i in range(rows):
+        for j in range(cols):
+            s = 0
+            while s < min(i, j) + 1 and M[i - s:i + 1, j - s:j + 1].all():
+                s += 1
+            S[i, j] = s
+    return S
+
+def test_square_table_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for density in (0.5, 0.8, 0.95):
+        M = rng.random((23, 31)) < density
+        assert (bei_core.square_table(M) == brute_square_table(M)).all()
+
+def test_square_table_stacks():
+    rng = np.random.default_rng(1)
+    stack = rng.random((4, 12, 15)) < 0.85
+    S = bei_core.square_table(stack)
+    for M, table in zip(stack, S):
+        assert (table == brute_square_table(M)).all()
+
+def test_largest_interior_squares_are_largest_and_disjoint():
+    rng = np.random.default_rng(2)
+    M = np.zeros((40, 50), bool)
+    M[1:, 1:] = rng.random((39, 49)) < 0.97
+    squares = bei_core.largest_interior_squares(M, 5)
+    assert squares[0][1] == brute_square_table(M)[1:, 1:].max()
+    sides = [s for br, s in squares]
+    assert sides == sorted(sides, reverse=True)
+    covered = np.zeros(M.shape, int)
+    for (brx, bry), s in squares:
+        assert M[bry - s + 1:bry + 1, brx - s + 1:brx + 1].all()
+        covered[bry - s + 1:bry + 1, brx - s + 1:brx + 1] += 1
+    assert covered.max() == 1
+
+def test_largest_interior_squares_gap():
+    M = np.ones((30, 30), bool)
+    squares = bei_core.largest_interior_squares(M, 4, gap=3)
+    for num, ((x0, y0), s0) in enumerate(squares):
+        for (x1, y1), s1 in squares[num + 1:]:
+            ## Squares are at least gap cells apart along x or y
+            apart_x = max(x0 - s0 - x1, x1 - s1 - x0)
+            apart_y = max(y0 - s0 - y1, y1 - s1 - y0)
+            assert max(apart_x, apart_y) >= 3
+
+def test_pack_squares_fit_and_keep_their_distance():
+    M = np.zeros((60, 80), bool)
+    M[5:55, 5:75] = True
+    M[20:40, 30:50] = False
+    side, pitch, margin = 8, 12, 1
+    points = bei_core.pack_squares(M, side, pitch, margin)
+    assert len(points) > 0
+    half = int(side / 2) + margin
+    for row, col in points:
+        assert M[row - half:row + half + 1, col - half:col + half + 1].all()
+    for num, (r0, c0) in enumerate(points):
+        for r1, c1 in points[num + 1:]:
+            assert max(abs(r0 - r1), abs(c0 - c1)) >= pitch
+
+def test_pack_squares_fills_a_rectangle():
+    ## 10 cell squares at a pitch of 10 fit 4 x 5 times into a 44 x 54 block with a 1 cell margin
+    M = np.ones((44, 54), bool)
+    assert len(bei_core.pack_squares(M, 9, 10)) == 20